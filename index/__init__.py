@@ -4,14 +4,30 @@ Single package containing unified term/n-gram, wildcard, and proximity indexes.
 """
 
 from .builders import create_all_indexes
-from .access import get_posting_list, find_wildcard_matches, get_term_positions
+from .access import (
+    get_posting_list,
+    get_posting_array,
+    get_index_meta,
+    get_collection_ids,
+    get_unigram_dfs,
+    find_wildcard_matches,
+    get_term_positions,
+    get_term_frequencies,
+    invalidate,
+)
 from .io import dump, load
 
 __all__ = [
     "create_all_indexes",
     "get_posting_list", 
+    "get_posting_array",
+    "get_index_meta",
+    "get_collection_ids",
+    "get_unigram_dfs",
     "find_wildcard_matches",
     "get_term_positions",
+    "get_term_frequencies",
+    "invalidate",
     "dump",
     "load"
 ]
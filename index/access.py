@@ -2,15 +2,34 @@
 """
 Access functions for the unified Task 1 index package.
 Provides O(1) average-case lookups after the package is loaded.
+
+Results are cached per (query, index_path) and returned without copying, so
+every caller shares the same list: treat returned lists as read-only.
+
+Loaded packages are cached per path and checked against the file's
+(mtime, size) on every public lookup, cache hit or not: each public function
+goes through `_load_index` before its cached worker, so an index replaced on
+disk drops every cached result. `create_all_indexes` also calls `invalidate`
+after writing, so a rebuild in this process is seen even within one mtime tick.
 """
 
 import os
-from typing import List, Dict, Any, Union, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+import numpy as np
+
+from .codec import DTYPE, count, decode, positions_at, run_lengths
+from .keys import TokGram, pack_key
 
-TokGram = Union[str, Tuple[str, ...]]
+# path -> ((mtime_ns, size), package), least recently used first
+_INDEX_CACHE: "OrderedDict[str, Tuple[Tuple[int, int], Dict[str, Any]]]" = OrderedDict()
+_INDEX_CACHE_MAX = 8
 
-# cache so we only load each index_path once
-_INDEX_CACHE: Dict[str, Dict[str, Any]] = {}
+_NO_META: Dict[str, Any] = {}   # shared stand-in for packages without __META__
+_EMPTY = np.empty(0, dtype=DTYPE)
+_EMPTY.flags.writeable = False
 
 
 # ----------------- internal helpers -----------------
@@ -18,71 +37,222 @@ _INDEX_CACHE: Dict[str, Dict[str, Any]] = {}
 def _load_index(index_path: str) -> Dict[str, Any]:
     """
     Load and cache the unified index package from disk.
-    Returns the cached dict if already loaded.
+    Returns the cached dict if already loaded and the file is unchanged.
     """
-    if index_path in _INDEX_CACHE:
-        return _INDEX_CACHE[index_path]
+    try:
+        st = os.stat(index_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Index file not found: {index_path}") from None
+    stamp = (st.st_mtime_ns, st.st_size)
 
-    from .io import load  # type: ignore
+    cached = _INDEX_CACHE.get(index_path)
+    if cached is not None:
+        if cached[0] == stamp:
+            _INDEX_CACHE.move_to_end(index_path)
+            return cached[1]
+        invalidate(index_path)   # rewritten behind our back: results are stale too
 
-    if not os.path.exists(index_path):
-        raise FileNotFoundError(f"Index file not found: {index_path}")
+    from .io import load  # type: ignore
 
     package = load(index_path)
     if not isinstance(package, dict):
         raise ValueError("Loaded index package is not a dict")
 
     # cache it
-    _INDEX_CACHE[index_path] = package
+    _INDEX_CACHE[index_path] = (stamp, package)
+    while len(_INDEX_CACHE) > _INDEX_CACHE_MAX:
+        _INDEX_CACHE.popitem(last=False)
     return package
 
 
+def _key(term: TokGram, package: Dict[str, Any]) -> Optional[Union[int, TokGram]]:
+    """
+    Translate `term` into the key used by "unified"/"proximity": its packed
+    vocab ids (see index/keys.py), or None if a token is out of vocabulary.
+    Packages without a "vocab" are keyed by the terms themselves.
+    """
+    vocab = package.get("vocab")
+    if vocab is None:
+        return term
+    return pack_key(term, vocab, package["__META__"]["key_bits"])
+
+
 # ----------------- public API -----------------
 
+@lru_cache(maxsize=16384)
+def _decoded_posting(term: TokGram, index_path: str) -> np.ndarray:
+    """Decode (once per term and path) the delta-varint posting blob for `term`."""
+    package = _load_index(index_path)
+    unified = package.get("unified", {})
+    posting = unified.get(_key(term, package))
+    if posting is None:
+        return _EMPTY
+    arr = decode(posting)
+    arr.flags.writeable = False  # shared via the cache; callers must not mutate
+    return arr
+
+
+@lru_cache(maxsize=16384)
+def _posting_list(term: TokGram, index_path: str) -> List[int]:
+    return _decoded_posting(term, index_path).tolist()
+
+
 def get_posting_list(term: TokGram, index_path: str) -> List[int]:
     """
     Return sorted list of document IDs containing `term` (unigram, bigram, trigram).
     If not found, return [].
+    The list is shared between callers (cached); do not mutate it.
+    """
+    _load_index(index_path)   # re-stat the file; a changed index drops cached results
+    return _posting_list(term, index_path)
+
+
+def get_posting_array(term: TokGram, index_path: str) -> np.ndarray:
+    """
+    Same as `get_posting_list`, but return the sorted doc IDs as a read-only
+    int32 numpy array (empty if not found), for vectorized set operations.
     """
+    _load_index(index_path)
+    return _decoded_posting(term, index_path)
+
+
+def get_index_meta(index_path: str) -> Dict[str, Any]:
+    """Return the package's __META__ dict (from the cached package; do not mutate)."""
+    return _load_index(index_path).get("__META__", _NO_META)
+
+
+def get_collection_ids(index_path: str) -> np.ndarray:
+    """Return every document ID in the collection as a sorted, read-only int32 array."""
+    _load_index(index_path)
+    return _collection_ids(index_path)
+
+
+@lru_cache(maxsize=64)
+def _collection_ids(index_path: str) -> np.ndarray:
+    meta = get_index_meta(index_path)
+    ids = meta.get("doc_ids")
+    if ids is None:
+        # packages built before doc_ids was stored
+        ids = np.array(sorted(meta.get("doc_lengths", {})), dtype=DTYPE)
+    ids = np.asarray(ids, dtype=DTYPE)
+    ids.flags.writeable = False
+    return ids
+
+
+def get_unigram_dfs(index_path: str) -> Dict[str, int]:
+    """
+    Return {token: document frequency} for every unigram in the index, built
+    once per index from the stored unigram_df array (or, for packages without
+    it, from the posting headers; postings are not decoded).
+    Shared between callers (cached); do not mutate.
+    """
+    _load_index(index_path)
+    return _unigram_dfs(index_path)
+
+
+@lru_cache(maxsize=64)
+def _unigram_dfs(index_path: str) -> Dict[str, int]:
     package = _load_index(index_path)
     unified = package.get("unified", {})
-    posting = unified.get(term)
-    if posting is None:
-        return []
-    # Already stored as sorted list
-    return list(posting)
+    vocab = package.get("vocab")
+    if vocab is None:
+        return {t: count(p) for t, p in unified.items() if isinstance(t, str)}
+    dfs = package.get("__META__", {}).get("unigram_df")
+    if dfs is not None:
+        dfs = dfs.tolist()
+        return {t: dfs[i - 1] for t, i in vocab.items()}
+    return {t: count(unified[i]) for t, i in vocab.items()}
 
 
 def find_wildcard_matches(pattern: str, index_path: str) -> List[str]:
     """
     Return sorted list of terms that contain the given char n-gram (wildcard pattern).
     If not found, return [].
+    The list is the one stored in the package (cached); do not mutate it.
 
     Example:
         "$cl" -> ["class", "climate", "clear"]
         "te$" -> ["climate", "update"]
     """
+    _load_index(index_path)
+    return _wildcard_matches(pattern, index_path)
+
+
+@lru_cache(maxsize=16384)
+def _wildcard_matches(pattern: str, index_path: str) -> List[str]:
     package = _load_index(index_path)
     wildcard = package.get("wildcard", {})
     terms = wildcard.get(pattern)
     if terms is None:
         return []
     # Already stored as lexicographic list
-    return list(terms)
+    return terms
 
 
 def get_term_positions(term: TokGram, doc_id: int, index_path: str) -> List[int]:
     """
     Return sorted list of positions for `term` in document `doc_id`.
     If not found, return [].
+    The list is shared between callers (cached); do not mutate it.
     """
+    _load_index(index_path)
+    return _term_positions(term, doc_id, index_path)
+
+
+@lru_cache(maxsize=16384)
+def _term_positions(term: TokGram, doc_id: int, index_path: str) -> List[int]:
     package = _load_index(index_path)
     proximity = package.get("proximity", {})
-    docmap = proximity.get(term)
-    if docmap is None:
+    packed = proximity.get(_key(term, package))
+    if packed is None:
         return []
-    positions = docmap.get(doc_id)
-    if positions is None:
+    # positions are stored per n-gram, one run per doc in posting order
+    ids = _decoded_posting(term, index_path)
+    i = int(np.searchsorted(ids, doc_id))
+    if i == len(ids) or ids[i] != doc_id:
         return []
-    # Already stored as sorted list
-    return list(positions)
+    return positions_at(packed, i).tolist()
+
+
+def get_term_frequencies(term: TokGram, index_path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (doc_ids, tfs) for `term`: its sorted posting as an int32 array and
+    the number of occurrences in each of those docs, aligned. Both read-only;
+    empty arrays if not found.
+    """
+    _load_index(index_path)
+    return _term_frequencies(term, index_path)
+
+
+@lru_cache(maxsize=16384)
+def _term_frequencies(term: TokGram, index_path: str) -> Tuple[np.ndarray, np.ndarray]:
+    package = _load_index(index_path)
+    proximity = package.get("proximity", {})
+    packed = proximity.get(_key(term, package))
+    if packed is None:
+        return _EMPTY, _EMPTY
+    tfs = run_lengths(packed)
+    tfs.flags.writeable = False
+    return _decoded_posting(term, index_path), tfs
+
+
+def invalidate(index_path: str) -> None:
+    """
+    Forget the cached package for `index_path` and every cached lookup result
+    (those caches are shared across paths, so they are cleared as a whole).
+    Call after rewriting an index file in place.
+    """
+    _INDEX_CACHE.pop(index_path, None)
+    for fn in _RESULT_CACHES:
+        fn.cache_clear()
+
+
+_RESULT_CACHES = (
+    _decoded_posting,
+    _posting_list,
+    _wildcard_matches,
+    _term_positions,
+    _collection_ids,
+    _unigram_dfs,
+    _term_frequencies,
+)
@@ -4,41 +4,161 @@ Unified Index Package Builder - Task 1
 Creates a single on-disk package containing all three sub-indexes.
 """
 
-from typing import List, Dict, Union, Tuple, Any, Optional
+import os
+from typing import List, Dict, Any, Optional
 
-TokGram = Union[str, Tuple[str, ...]]
+import numpy as np
+
+from .keys import key_bits
+
+# Below this many documents the build runs in-process; forking workers and
+# shipping their partial indexes back costs more than it saves.
+_PARALLEL_MIN_DOCS = 1000
 
 
 # ----------------- helpers (no lambdas, no default factories) -----------------
 
-def _token_ngrams(tokens: List[str], n_max: int = 3):
-    """Yield (key, pos) for token n-grams n=1..n_max (inclusive)."""
-    L = len(tokens)
-    for n in range(1, n_max + 1):
-        if L < n:
-            break
-        for i in range(L - n + 1):
-            if n == 1:
-                key: TokGram = tokens[i]
-            else:
-                key = tuple(tokens[i : i + n])
-            yield key, i
-
-
-def _char_ngrams(term: str, n_max: int = 3):
+def _token_ngrams(ids: List[int], n_max: int = 3, bits: int = 21):
+    """
+    Return (keys, positions) for token n-grams n=1..n_max (inclusive) of an
+    integer-encoded document. A unigram key is the token id itself; an n-gram
+    key packs its ids as id_0 | id_1 << bits | id_2 << 2*bits (see pack_key).
+    Ids start at 1, so keys of different orders never collide.
+
+    This stays numpy rather than a numba kernel: it is about 1% of _build_partial
+    (the dict appends below dominate), and a JIT run plus tolist() is slower than
+    the vectorised shifts, before paying a ~1 s compile.
     """
-    Yield character n-grams (length 1..n_max) from the boundary-augmented term `$<term>$`,
+    L = len(ids)
+    keys = list(ids)
+    positions = list(range(L))
+    if n_max * bits <= 63:
+        arr = np.asarray(ids, dtype=np.int64)
+        acc = arr
+        for n in range(2, min(n_max, L) + 1):
+            acc = acc[:-1] | (arr[n - 1 :] << ((n - 1) * bits))
+            keys += acc.tolist()
+            positions += positions[: L - n + 1]
+    else:
+        # packed keys would overflow int64: fall back to Python ints
+        acc = ids
+        for n in range(2, min(n_max, L) + 1):
+            shift = (n - 1) * bits
+            acc = [k | (t << shift) for k, t in zip(acc, ids[n - 1 :])]
+            keys += acc
+            positions += positions[: L - n + 1]
+    return keys, positions
+
+
+def _char_ngrams(term: str, n_max: int = 3) -> List[str]:
+    """
+    Return character n-grams (length 1..n_max) from the boundary-augmented term `$<term>$`,
     excluding the bare '$' unigram.
     Includes both interior grams (e.g., 'mat') and boundary grams ('$cl', 'te$').
+    Unigrams come straight from the term; longer grams are sliced in one comprehension
+    per length rather than yielded one at a time.
     """
     s = f"${term}$"
     L = len(s)
-    for n in range(1, n_max + 1):
-        for i in range(L - n + 1):
-            cg = s[i : i + n]
-            if cg == "$":
-                continue
-            yield cg
+    grams = list(term) if "$" not in term else [c for c in term if c != "$"]
+    for n in range(2, n_max + 1):
+        grams += [s[i : i + n] for i in range(L - n + 1)]
+    return grams
+
+
+def _build_partial(
+    encoded_docs: List[List[int]],
+    doc_ids: List[int],
+    n_max: int,
+    bits: int,
+):
+    """
+    Index one shard of integer-encoded documents, given in ascending doc_id order
+    (a doc_id may repeat; its documents' positions are merged in ascending order).
+    Returns (unified_lists, proximity, doc_lengths, total_len).
+    """
+    unified_lists: Dict[int, List[int]] = {}                  # packed key -> [doc_id,...] (asc)
+    proximity: Dict[int, Dict[int, List[int]]] = {}           # packed key -> {doc_id: [positions]}
+
+    doc_lengths: Dict[int, int] = {}
+    total_len = 0
+    repeated = set()                                          # doc_ids given to several docs
+    prev_did = None
+
+    for ids, did in zip(encoded_docs, doc_ids):
+        if did == prev_did:
+            repeated.add(did)
+        prev_did = did
+        L = len(ids)
+        doc_lengths[did] = L
+        total_len += L
+
+        # token n-grams (1..3): unified + proximity
+        keys, positions = _token_ngrams(ids, n_max=n_max, bits=bits)
+        for key, pos in zip(keys, positions):
+            # unified postings (append-only; ascending by construction)
+            lst = unified_lists.get(key)
+            if lst is None:
+                unified_lists[key] = [did]
+            elif lst[-1] != did:
+                lst.append(did)
+
+            # proximity positions (plain dict-of-lists; _token_ngrams yields ascending pos)
+            docmap = proximity.get(key)
+            if docmap is None:
+                docmap = {}
+                proximity[key] = docmap
+            pos_list = docmap.get(did)
+            if pos_list is None:
+                pos_list = []
+                docmap[did] = pos_list
+            pos_list.append(pos)
+
+    # a repeated doc_id appends a second run of positions starting again at 0,
+    # so only its position lists can be out of order
+    if repeated:
+        for docmap in proximity.values():
+            for did in repeated.intersection(docmap):
+                docmap[did].sort()
+
+    return unified_lists, proximity, doc_lengths, total_len
+
+
+def _build_partial_star(args):
+    return _build_partial(*args)
+
+
+def _merge_partial(acc, part) -> None:
+    """
+    Fold `part` into `acc` in place. Shards are merged in doc_id order, so a
+    posting list grows by plain concatenation.
+    """
+    unified_lists, proximity, doc_lengths, _ = acc
+    p_unified, p_proximity, p_lengths, _ = part
+
+    for key, ids in p_unified.items():
+        lst = unified_lists.get(key)
+        if lst is None:
+            unified_lists[key] = ids
+        elif lst[-1] == ids[0]:            # duplicate doc_id straddling two shards
+            lst.extend(ids[1:])
+        else:
+            lst.extend(ids)
+
+    for key, p_docmap in p_proximity.items():
+        docmap = proximity.get(key)
+        if docmap is None:
+            proximity[key] = p_docmap
+            continue
+        for did, positions in p_docmap.items():
+            pos_list = docmap.get(did)
+            if pos_list is None:
+                docmap[did] = positions
+            else:                           # doc_id straddling two shards
+                pos_list.extend(positions)
+                pos_list.sort()
+
+    doc_lengths.update(p_lengths)
 
 
 # ------------------------------------------------------------------------------
@@ -46,7 +166,8 @@ def _char_ngrams(term: str, n_max: int = 3):
 def create_all_indexes(
     tokenized_docs: List[List[str]],
     index_path: str,
-    doc_ids: Optional[List[int]] = None
+    doc_ids: Optional[List[int]] = None,
+    workers: Optional[int] = None,
 ) -> None:
     """
     Build a unified index package containing all three sub-indexes in a single pass.
@@ -55,10 +176,15 @@ def create_all_indexes(
         tokenized_docs: List of tokenized documents, each document is a list of tokens
         index_path: Path where the unified index package will be saved
         doc_ids: Optional list of document IDs. If None, uses sequential IDs (0, 1, 2, ...)
-                 Must be same length as tokenized_docs if provided.
+                 Must be same length as tokenized_docs if provided. IDs are stored as
+                 int32, so each must be an integer in [0, 2**31 - 1].
+        workers: Number of worker processes for large corpora (defaults to os.cpu_count()).
+                 Corpora smaller than _PARALLEL_MIN_DOCS are always built in-process.
     """
     # --- import here to comply with your project structure ---
     from .io import dump  # type: ignore
+    from .access import invalidate
+    from .codec import DTYPE, MAX_ID, encode_positions, encode_sorted
 
     if doc_ids is None:
         doc_ids = list(range(len(tokenized_docs)))
@@ -69,77 +195,110 @@ def create_all_indexes(
     NGRAMS_MAX = 3
     CHAR_NGRAMS_MAX = 3
 
-    # In-memory builders (plain dicts/sets/lists only; final package will convert sets to lists)
-    unified_sets: Dict[TokGram, set] = {}                     # tok/ngram -> set(doc_id)
-    proximity: Dict[TokGram, Dict[int, List[int]]] = {}       # tok/ngram -> {doc_id: [positions]}
-    wildcard_sets: Dict[str, set] = {}                        # char_ngram -> set(terms)
+    # Visit documents in ascending doc_id order so every posting list is built
+    # already sorted: a doc_id is appended only if it differs from the last one.
+    for d in doc_ids:
+        if not isinstance(d, (int, np.integer)):
+            raise TypeError(f"doc_ids must be integers, got {type(d).__name__}")
+    order = sorted(range(N), key=doc_ids.__getitem__)
+    sorted_ids = [doc_ids[i] for i in order]
+    if N and not (0 <= sorted_ids[0] and sorted_ids[-1] <= MAX_ID):
+        bad = sorted_ids[0] if sorted_ids[0] < 0 else sorted_ids[-1]
+        raise ValueError(f"doc_ids must be in [0, {MAX_ID}] (stored as int32), got {bad}")
 
-    doc_lengths: Dict[int, int] = {}
-    total_len = 0
+    # Integer-encode every token once (ids from 1, in first-seen order), so the
+    # n-gram keys hashed per position are plain ints instead of str/tuples.
+    vocab: Dict[str, int] = {}
+    encoded_docs = [
+        [vocab.setdefault(t, len(vocab) + 1) for t in tokenized_docs[i]] for i in order
+    ]
+    bits = key_bits(len(vocab))
 
-    # ---- Single pass over documents ------------------------------------------------
-    for tokens, did in zip(tokenized_docs, doc_ids):
-        L = len(tokens)
-        doc_lengths[did] = L
-        total_len += L
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, N)
 
-        # token n-grams (1..3): unified + proximity
-        for key, pos in _token_ngrams(tokens, n_max=NGRAMS_MAX):
-            # unified postings (set during build; list after post-process)
-            bucket = unified_sets.get(key)
-            if bucket is None:
-                bucket = set()
-                unified_sets[key] = bucket
-            bucket.add(did)
-
-            # proximity positions (plain dict-of-lists)
-            docmap = proximity.get(key)
-            if docmap is None:
-                docmap = {}
-                proximity[key] = docmap
-            pos_list = docmap.get(did)
-            if pos_list is None:
-                pos_list = []
-                docmap[did] = pos_list
-            pos_list.append(int(pos))
+    # ---- Pass over documents -------------------------------------------------------
+    if workers <= 1 or N < _PARALLEL_MIN_DOCS:
+        unified_lists, proximity, doc_lengths, total_len = _build_partial(
+            encoded_docs, sorted_ids, NGRAMS_MAX, bits
+        )
+    else:
+        # contiguous doc_id ranges per worker; imap hands the partial indexes
+        # back in shard order so they can be merged by concatenation
+        import multiprocessing
 
-        # wildcard char n-grams for unique terms (avoid redundant adds within the same doc)
-        for term in set(tokens):
-            for cg in _char_ngrams(term, n_max=CHAR_NGRAMS_MAX):
-                wb = wildcard_sets.get(cg)
-                if wb is None:
-                    wb = set()
-                    wildcard_sets[cg] = wb
-                wb.add(term)
+        step = -(-N // workers)
+        shards = [
+            (encoded_docs[i : i + step], sorted_ids[i : i + step], NGRAMS_MAX, bits)
+            for i in range(0, N, step)
+        ]
+        with multiprocessing.Pool(len(shards)) as pool:
+            parts = pool.imap(_build_partial_star, shards)
+            acc = next(parts)
+            total_len = acc[3]
+            for part in parts:
+                _merge_partial(acc, part)
+                total_len += part[3]
+        unified_lists, proximity, doc_lengths, _ = acc
 
-    avgdl = float(total_len / N) if N > 0 else 0.0
+    # wildcard char n-grams: wildcard postings are term-sets, so each distinct
+    # term (= each vocab entry) is expanded exactly once
+    wildcard_sets: Dict[str, set] = {}                        # char_ngram -> set(terms)
+    for term in vocab:
+        for cg in _char_ngrams(term, n_max=CHAR_NGRAMS_MAX):
+            wb = wildcard_sets.get(cg)
+            if wb is None:
+                wb = set()
+                wildcard_sets[cg] = wb
+            wb.add(term)
 
-    # ---- Deterministic post-processing (convert sets -> sorted lists) --------------
-    # 1) unified postings: doc IDs strictly ascending
-    unified: Dict[TokGram, List[int]] = {k: sorted(v) for k, v in unified_sets.items()}
+    avgdl = float(total_len / N) if N > 0 else 0.0
 
-    # 2) proximity positions: strictly ascending per (term, doc_id)
-    for key, docmap in proximity.items():
-        for did, pos_list in docmap.items():
-            pos_list.sort()
+    # ---- Deterministic post-processing ---------------------------------------------
+    # 1) unified postings: doc IDs strictly ascending (already, by visit order),
+    #    stored as delta-varint blobs (see index/codec.py)
+    unified: Dict[int, bytes] = {k: encode_sorted(v) for k, v in unified_lists.items()}
 
+    # 2) proximity positions: strictly ascending per (term, doc_id) (already, by emit order),
+    #    packed per n-gram into one int32 buffer aligned with its posting list;
+    #    docmaps are keyed in the same ascending doc_id order as the postings
+    proximity_packed: Dict[int, bytes] = {k: encode_positions(proximity[k].values()) for k in unified}
     # 3) wildcard terms: strictly lexicographic (per spec)
     wildcard: Dict[str, List[str]] = {cg: sorted(terms) for cg, terms in wildcard_sets.items()}
 
+    # 4) document lengths: int32 array aligned with the sorted collection ids
+    collection_ids = np.unique(np.asarray(sorted_ids, dtype=DTYPE))
+    lengths = np.fromiter(
+        (doc_lengths[d] for d in collection_ids.tolist()), dtype=DTYPE, count=collection_ids.size
+    )
+
+    # 5) unigram document frequencies: int32, unigram_df[i - 1] belongs to vocab id i,
+    #    so rankers need not scan every posting header on a cold start
+    unigram_df = np.fromiter(
+        (len(unified_lists[i]) for i in range(1, len(vocab) + 1)), dtype=DTYPE, count=len(vocab)
+    )
+
     # ---- Final package (pickle-safe) ----------------------------------------------
     package: Dict[str, Any] = {
         "__META__": {
             "N": N,
-            "doc_lengths": doc_lengths,
+            "doc_ids": collection_ids,   # collection, sorted int32
+            "doc_lengths": lengths,      # int32, doc_lengths[i] belongs to doc_ids[i]
             "avgdl": avgdl,
             "version": "1.0",
             "ngrams_max": NGRAMS_MAX,
             "char_ngrams_max": CHAR_NGRAMS_MAX,
+            "key_bits": bits,
+            "unigram_df": unigram_df,    # int32, indexed by vocab id - 1
         },
-        "unified": unified,        # tok/ngram -> [doc_id,...] (asc)
+        "vocab": vocab,            # token -> id (>= 1); n-gram keys are packed ids
+        "unified": unified,        # packed key -> encoded [doc_id,...] (asc)
         "wildcard": wildcard,      # char_ngram -> [term,...] (lex asc)
-        "proximity": proximity,    # tok/ngram -> {doc_id: [pos,...] (asc)}
+        "proximity": proximity_packed,  # packed key -> int32 [n | ends | positions] (asc)
     }
 
-    # Save the unified package to disk (single file)
+    # Save the unified package to disk (single file); cached lookups on the
+    # previous file at this path are stale now
     dump(package, index_path)
+    invalidate(str(index_path))
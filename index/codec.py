@@ -0,0 +1,135 @@
+# index/codec.py
+"""
+Posting-list codec for the unified index package.
+Sorted doc-ID lists are stored as delta-encoded LEB128 varints. IDs are
+non-negative and at most MAX_ID (2**31 - 1), since they decode to int32:
+
+    varint(count) | varint(id_0) | varint(id_1 - id_0) | ...
+
+Most gaps in a posting list fit in one byte, so a list costs ~1 byte per posting
+instead of a boxed Python int. Decoding is vectorized with numpy.
+
+Bytes after the last varint are ignored, so a container may pad a blob to
+align the one that follows it.
+
+Long ("hot") lists of at least RAW_MIN IDs are instead stored as plain
+little-endian int32 behind the 4-byte marker RAW_TAG (a non-canonical varint
+that `_put_varint` never emits), so decoding them is a zero-copy np.frombuffer
+whose int32 view is aligned whenever the blob itself starts 4-byte aligned:
+
+    RAW_TAG | id_0 | id_1 | ...
+
+Proximity positions of one n-gram are stored as a single native int32 array,
+aligned with that n-gram's posting list (the i-th doc ID owns the i-th run):
+
+    n | end_0 | ... | end_{n-1} | positions of doc 0 | ... | positions of doc n-1
+"""
+
+from array import array
+from typing import Iterable, List
+
+import numpy as np
+
+DTYPE = np.int32
+MAX_ID = int(np.iinfo(DTYPE).max)
+RAW_MIN = 1024
+RAW_TAG = b"\x80\x80\x80\x00"
+_RAW_DTYPE = np.dtype("<i4")
+
+
+def _put_varint(out: bytearray, v: int) -> None:
+    while v >= 0x80:
+        out.append((v & 0x7F) | 0x80)
+        v >>= 7
+    out.append(v)
+
+
+def encode_sorted(ids: Iterable[int]) -> bytes:
+    """
+    Encode a strictly ascending sequence of IDs in [0, MAX_ID].
+    Raises ValueError if the input is not strictly ascending or out of that range.
+    """
+    ids = list(ids)
+    if ids and ids[-1] > MAX_ID:
+        raise ValueError(f"encode_sorted expects ids in [0, {MAX_ID}], got {ids[-1]}")
+    if len(ids) >= RAW_MIN:
+        arr = np.asarray(ids, dtype=np.int64)
+        if arr[0] < 0 or (arr[1:] <= arr[:-1]).any():
+            raise ValueError("encode_sorted expects strictly ascending non-negative ids")
+        return RAW_TAG + arr.astype(_RAW_DTYPE).tobytes()
+    out = bytearray()
+    _put_varint(out, len(ids))
+    prev = -1
+    for i in ids:
+        if i <= prev:
+            raise ValueError("encode_sorted expects strictly ascending non-negative ids")
+        _put_varint(out, i - prev - 1 if prev >= 0 else i)
+        prev = i
+    return bytes(out)
+
+
+def decode(buf) -> np.ndarray:
+    """Decode a buffer produced by `encode_sorted` into a sorted int32 array."""
+    if buf[:4] == RAW_TAG:
+        return np.frombuffer(buf, dtype=_RAW_DTYPE, offset=4)
+    b = np.frombuffer(buf, dtype=np.uint8)
+    if b.size == 0:
+        return np.empty(0, dtype=DTYPE)
+    n = count(buf)
+    hdr = 1
+    while b[hdr - 1] >= 0x80:
+        hdr += 1
+    body = b[hdr : hdr + n]
+    if n and body.max() < 0x80:
+        # every id/gap varint is a single byte: body = id_0, gap_1 - 1, ...
+        gaps = body.astype(DTYPE)
+        gaps[1:] += 1
+        return np.cumsum(gaps, dtype=DTYPE)
+    ends = np.flatnonzero(b < 0x80)[: n + 1]        # last byte of every varint
+    b = b[: ends[-1] + 1]                           # drop any trailing padding
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    shift = np.arange(b.size) - np.repeat(starts, ends - starts + 1)
+    values = np.add.reduceat((b & 0x7F).astype(np.int64) << (7 * shift), starts)
+    gaps = values[1:]
+    gaps[1:] += 1                                   # gaps are stored minus one
+    return np.cumsum(gaps).astype(DTYPE)
+
+
+def count(buf) -> int:
+    """Number of IDs in an encoded buffer, read from its header only."""
+    if buf[:4] == RAW_TAG:
+        return (len(buf) - 4) // 4
+    n = shift = 0
+    for byte in bytes(buf[:10]):
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n
+        shift += 7
+    raise ValueError("Corrupt posting buffer header")
+
+
+def encode_positions(runs: Iterable[List[int]]) -> bytes:
+    """Pack per-document position lists (in posting order) into one int32 buffer."""
+    ends: List[int] = []
+    flat: List[int] = []
+    for positions in runs:
+        flat += positions
+        ends.append(len(flat))
+    return array("i", [len(ends)] + ends + flat).tobytes()
+
+
+def positions_at(buf, i: int) -> np.ndarray:
+    """Positions of the i-th document of a buffer produced by `encode_positions` (no copy)."""
+    a = np.frombuffer(buf, dtype=np.int32)
+    base = 1 + int(a[0])
+    start = int(a[i]) if i else 0
+    return a[base + start : base + int(a[i + 1])]
+
+
+def run_lengths(buf) -> np.ndarray:
+    """Per-document position counts (term frequencies) of an `encode_positions` buffer."""
+    a = np.frombuffer(buf, dtype=np.int32)
+    ends = a[1 : 1 + int(a[0])]
+    return np.diff(ends, prepend=0).astype(DTYPE)
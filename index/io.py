@@ -1,13 +1,234 @@
-import pickle, pathlib, gzip
-from typing import Any
+import io, mmap, os, pickle, pathlib, struct
+from collections.abc import Mapping
+from typing import Any, Dict, List
+
+import numpy as np
+import zstandard
 
 # feel free to modify this file to suit your needs, this serilization is only for demonstration purposes
 
+# On-disk layout (single file):
+#   MAGIC | u64 len(head) | head | pad to _ALIGN | postings blob
+#   head = zstd( u32 n_buffers | u64 len(pickle) | pickle | [u64 len(buf) | buf] * n_buffers )
+# The pickle uses protocol 5 with a buffer_callback, so large contiguous buffers
+# (e.g. numpy arrays) are written out-of-band and restored without re-encoding.
+#
+# Every top-level entry of the package whose values are all encoded blobs
+# (bytes) -- "unified" postings and packed "proximity" positions -- is
+# concatenated uncompressed into the postings section, and the head only keeps
+# a term -> slot table plus an offsets array per entry (entries with the same
+# key set share one table). `load` memory-maps the file and exposes those
+# entries as PostingsViews, so opening an index never deserializes them.
+#
+# When every key of an entry is an int64 (the packed n-gram keys), its slot
+# table is just the sorted key array -- slot i belongs to keys[i] -- which is
+# written out-of-band like any numpy buffer, so loading it costs no unpickling.
+#
+# Blobs whose length is a multiple of 4 (raw int32 postings, packed positions)
+# start 4-byte aligned in the mapping, so the codec's int32 views of them are
+# aligned. The zero pad bytes before such a blob trail the previous blob, which
+# is then a varint list (the codec ignores bytes after its last varint).
+
+MAGIC = b"IRPKG5\x00\x05"
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+_ALIGN = 8                                          # out-of-band buffer / postings section alignment
+_WORD = 4                                           # int32 blob alignment
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+
+
+class PostingsView(Mapping):
+    """Read-only mapping term -> memoryview of its encoded blob in an mmap'd section."""
+
+    def __init__(self, slots: Dict[Any, int], offsets: np.ndarray, blob: memoryview):
+        self._slots = slots
+        self._offsets = offsets
+        self._blob = blob
+
+    def __getitem__(self, term) -> memoryview:
+        i = self._slots[term]
+        return self._blob[self._offsets[i] : self._offsets[i + 1]]
+
+    def __contains__(self, term) -> bool:
+        return term in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+class SortedPostingsView(PostingsView):
+    """PostingsView over int keys whose slot table is a sorted int64 array (binary search)."""
+
+    def _slot(self, term) -> int:
+        keys = self._slots
+        if isinstance(term, (int, np.integer)) and _INT64_MIN <= term <= _INT64_MAX:
+            i = int(keys.searchsorted(term))
+            if i < keys.size and keys[i] == term:
+                return i
+        return -1
+
+    def __getitem__(self, term) -> memoryview:
+        i = self._slot(term)
+        if i < 0:
+            raise KeyError(term)
+        return self._blob[self._offsets[i] : self._offsets[i + 1]]
+
+    def __contains__(self, term) -> bool:
+        return self._slot(term) >= 0
+
+    def __iter__(self):
+        return iter(self._slots.tolist())
+
+    def __len__(self) -> int:
+        return int(self._slots.size)
+
+
+def _pack(obj: Any) -> bytes:
+    buffers: List[pickle.PickleBuffer] = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    cctx = zstandard.ZstdCompressor(level=3, threads=-1)
+    out = io.BytesIO()
+    with cctx.stream_writer(out, closefd=False) as w:
+        w.write(_U32.pack(len(buffers)))
+        w.write(_U64.pack(len(data)))
+        w.write(data)
+        for buf in buffers:
+            raw = buf.raw()
+            w.write(_U64.pack(raw.nbytes))
+            w.write(raw)
+    return out.getvalue()
+
+
+def _unpack(head) -> Any:
+    payload = zstandard.ZstdDecompressor().stream_reader(head).readall()
+    view = memoryview(payload)
+    (n_buffers,) = _U32.unpack_from(view, 0)
+    (n_data,) = _U64.unpack_from(view, _U32.size)
+    off = _U32.size + _U64.size
+    data = view[off : off + n_data]
+    off += n_data
+    buffers = []
+    for _ in range(n_buffers):
+        (n,) = _U64.unpack_from(view, off)
+        off += _U64.size
+        buf = view[off : off + n]
+        if np.frombuffer(buf, dtype=np.uint8).ctypes.data % _ALIGN:
+            # numpy kernels (searchsorted, ...) copy misaligned arrays on every call
+            buf = bytes(buf)
+        buffers.append(buf)
+        off += n
+    return pickle.loads(data, buffers=buffers)
+
+
+def _is_blob_mapping(value: Any) -> bool:
+    return (
+        isinstance(value, Mapping)
+        and len(value) > 0
+        and all(isinstance(v, (bytes, memoryview)) for v in value.values())
+    )
+
+
+def _int64_keys(value: Mapping):
+    """Sorted int64 array of the mapping's keys, or None if any key is not an int64."""
+    keys = list(value)
+    if not all(type(k) is int and _INT64_MIN <= k <= _INT64_MAX for k in keys):
+        return None
+    return np.sort(np.asarray(keys, dtype=np.int64))
+
+
+def _slot_order(slots) -> List[Any]:
+    return slots.tolist() if isinstance(slots, np.ndarray) else list(slots)
+
+
+def _split_postings(obj: Any):
+    """Return (head_obj, blobs) where blobs are the encoded entries to store raw."""
+    if not isinstance(obj, dict) or not any(_is_blob_mapping(v) for v in obj.values()):
+        return ("plain", obj), []
+    rest: Dict[Any, Any] = {}
+    sections = []
+    blobs = []
+    slots: Any = {}
+    order: List[Any] = []
+    pos = 0
+    for name, value in obj.items():
+        if not _is_blob_mapping(value):
+            rest[name] = value
+            continue
+        if len(value) != len(order) or value.keys() != set(order):
+            keys = _int64_keys(value)
+            slots = keys if keys is not None else {term: i for i, term in enumerate(value)}
+            order = _slot_order(slots)
+        offsets = np.empty(len(order) + 1, dtype=np.int64)
+        offsets[0] = pos
+        for i, term in enumerate(order):   # slot order, so a shared table stays valid
+            blob = value[term]
+            if len(blob) % _WORD == 0 and pos % _WORD:
+                blobs.append(bytes(-pos % _WORD))
+                pos += -pos % _WORD
+                offsets[i] = pos
+            blobs.append(blob)
+            pos += len(blob)
+            offsets[i + 1] = pos
+        sections.append((name, slots, offsets))
+    return ("split", rest, sections), blobs
+
+
 def dump(obj: Any, path: str):
+    """
+    Write `obj` as a package file at `path`, replacing any previous file.
+    Windows cannot replace a file that is still memory-mapped, so this process's
+    cached maps of `path` (see index.access.invalidate) are released before the
+    swap; a package or view the caller still holds from `load(path)` keeps the
+    old map open, and there os.replace raises PermissionError.
+    """
+    from .access import invalidate
+
+    cache_key = str(path)           # access caches by the path string as given
     path = pathlib.Path(path)
-    with gzip.open(path, "wb") as f:
-        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    head_obj, blobs = _split_postings(obj)
+    head = _pack(head_obj)
+    # write to a sibling file and swap it in, so a reader that still has the
+    # previous file mapped keeps a valid (unlinked) copy instead of a truncated one
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(_U64.pack(len(head)))
+        f.write(head)
+        f.write(bytes(-(len(MAGIC) + _U64.size + len(head)) % _ALIGN))
+        for blob in blobs:
+            f.write(blob)
+    invalidate(cache_key)
+    os.replace(tmp, path)
+
+
+def is_package(path) -> bool:
+    """True if `path` is a package file `load` can read (older formats, e.g. gzip, are not)."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
 
 def load(path: str):
-    with gzip.open(path, "rb") as f:
-        return pickle.load(f)
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    if bytes(view[: len(MAGIC)]) != MAGIC:
+        raise ValueError(f"Not an index package file: {path}")
+    (n_head,) = _U64.unpack_from(view, len(MAGIC))
+    start = len(MAGIC) + _U64.size
+    head_obj = _unpack(view[start : start + n_head])
+    if head_obj[0] == "plain":
+        return head_obj[1]
+    _, rest, sections = head_obj
+    base = start + n_head
+    blob = view[base + -base % _ALIGN :]
+    package = dict(rest)
+    for name, slots, offsets in sections:
+        view_cls = SortedPostingsView if isinstance(slots, np.ndarray) else PostingsView
+        package[name] = view_cls(slots, offsets, blob)
+    return package
@@ -0,0 +1,41 @@
+# index/keys.py
+"""
+Integer keys for token n-grams in the unified index package.
+Every token gets a vocab id >= 1; an n-gram (t_0, ..., t_{n-1}) is keyed by
+
+    id(t_0) | id(t_1) << bits | ... | id(t_{n-1}) << (n-1)*bits
+
+where `bits` is wide enough for the largest id. Because no id is 0, a unigram
+key is < 2**bits, a bigram key < 2**(2*bits), and so on, so orders never collide.
+"""
+
+from typing import Dict, Optional, Tuple, Union
+
+TokGram = Union[str, Tuple[str, ...]]
+
+
+def key_bits(vocab_size: int) -> int:
+    """Bits per id slot for a vocabulary of `vocab_size` tokens (ids 1..vocab_size)."""
+    return max(1, vocab_size.bit_length())
+
+
+def pack_key(term: TokGram, vocab: Dict[str, int], bits: int) -> Optional[int]:
+    """
+    Map a token (str) or n-gram (tuple of 2+ str) to its packed key.
+    Returns None if any token is out of vocabulary, and for tuples of fewer
+    than two tokens: unigrams are keyed by the str alone, so a 1-tuple is not
+    an alias for it.
+    """
+    if isinstance(term, str):
+        return vocab.get(term)
+    if len(term) < 2:
+        return None
+    key = 0
+    shift = 0
+    for t in term:
+        i = vocab.get(t)
+        if i is None:
+            return None
+        key |= i << shift
+        shift += bits
+    return key
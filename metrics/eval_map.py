@@ -15,10 +15,16 @@ Notes
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import AbstractSet, Dict, List, Tuple
 import sys
 
+try:  # optional: orjson parses the (int-heavy) run files several times faster
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 REPO = Path(__file__).resolve().parents[1]
 RUNS_DIR = REPO / "runs"
 JUDGE    = REPO / "data" / "dev" / "relevance_judge.json"
@@ -26,6 +32,12 @@ JUDGE    = REPO / "data" / "dev" / "relevance_judge.json"
 
 # ---------------- I/O helpers ----------------
 
+@lru_cache(maxsize=64)
+def _parse_run(path: str, mtime_ns: int):
+    """Parse one run file; cached until the file's mtime changes."""
+    return _json_loads(Path(path).read_bytes())
+
+
 def _load_runs() -> List[Tuple[str, List[dict]]]:
     """Return a list of (filename, data) for each JSON list under ./runs/."""
     outs: List[Tuple[str, List[dict]]] = []
@@ -33,7 +45,7 @@ def _load_runs() -> List[Tuple[str, List[dict]]]:
         return outs
     for p in sorted(RUNS_DIR.glob("*.json")):
         try:
-            data = json.loads(p.read_text(encoding="utf-8"))
+            data = _parse_run(str(p), p.stat().st_mtime_ns)
             if isinstance(data, list):
                 outs.append((p.name, data))
         except Exception:
@@ -42,12 +54,14 @@ def _load_runs() -> List[Tuple[str, List[dict]]]:
     return outs
 
 
-def _load_judge() -> Dict[str, Dict[int, float]]:
+@lru_cache(maxsize=4)
+def _parse_judge(path: str, mtime_ns: int) -> Dict[str, Dict[int, float]]:
     """
     Load dev relevance judgments and normalize to: qid -> {doc_id: grade(float)}.
     Accepts either a dict-of-dicts or a list of objects with common field names.
+    Cached per (path, mtime) so repeated evaluations skip the parse.
     """
-    raw = json.loads(JUDGE.read_text(encoding="utf-8"))
+    raw = _json_loads(Path(path).read_bytes())
     out: Dict[str, Dict[int, float]] = {}
 
     if isinstance(raw, dict):
@@ -64,23 +78,31 @@ def _load_judge() -> Dict[str, Dict[int, float]]:
     return out
 
 
+def _load_judge() -> Dict[str, Dict[int, float]]:
+    """Judgments from JUDGE (re-parsed only when the file changes on disk)."""
+    return _parse_judge(str(JUDGE), JUDGE.stat().st_mtime_ns)
+
+
 # ---------------- MAP computation ----------------
 
-def _average_precision(run_docs: List[int], rel_map: Dict[int, float]) -> float:
-    """Binary AP with rel>0 considered relevant."""
-    rel_docs = {d for d, g in rel_map.items() if g > 0}
+def _relevant_sets(gold: Dict[str, Dict[int, float]]) -> Dict[str, AbstractSet[int]]:
+    """Binarize judgments once (rel>0 considered relevant): qid -> set of relevant doc IDs."""
+    return {qid: frozenset(d for d, g in rel_map.items() if g > 0) for qid, rel_map in gold.items()}
+
+
+def _average_precision(run_docs: List[int], rel_docs: AbstractSet[int]) -> float:
+    """Binary AP of a ranked list against the set of relevant doc IDs."""
     if not rel_docs:
         return 0.0
-    num_rel_seen = 0
+    # ranks (1-based) of the relevant hits, then precision@rank summed in rank order
+    ranks = [i for i, d in enumerate(run_docs, 1) if d in rel_docs]
     sum_prec = 0.0
-    for i, d in enumerate(run_docs, 1):  # ranks start at 1
-        if d in rel_docs:
-            num_rel_seen += 1
-            sum_prec += num_rel_seen / i
+    for num_rel_seen, i in enumerate(ranks, 1):
+        sum_prec += num_rel_seen / i
     return sum_prec / len(rel_docs)
 
 
-def _map_for_run(items: List[dict], gold: Dict[str, Dict[int, float]]) -> float:
+def _map_for_run(items: List[dict], relevant: Dict[str, AbstractSet[int]]) -> float:
     """Compute mean AP over all qids in one run."""
     if not items:
         return 0.0
@@ -90,8 +112,9 @@ def _map_for_run(items: List[dict], gold: Dict[str, Dict[int, float]]) -> float:
         docs = obj.get("doc_ids") or []
         if not isinstance(docs, list):
             docs = []
-        rel_map = gold.get(qid, {})
-        ap = _average_precision([int(d) for d in docs], rel_map)
+        if not all(type(d) is int for d in docs):
+            docs = [int(d) for d in docs]  # JSON already yields ints for well-formed runs
+        ap = _average_precision(docs, relevant.get(qid, frozenset()))
         ap_values.append(ap)
     return (sum(ap_values) / len(ap_values)) if ap_values else 0.0
 
@@ -111,7 +134,7 @@ def main() -> int:
     _print_header()
     try:
         runs = _load_runs()
-        gold = _load_judge()
+        relevant = _relevant_sets(_load_judge())
         if not runs:
             sys.stdout.write("| (no runs found)              |   0.0000 |\n")
             sys.stdout.write("+------------------------------+----------+\n")
@@ -119,7 +142,7 @@ def main() -> int:
             return 0
 
         for name, items in runs:
-            score = _map_for_run(items, gold)
+            score = _map_for_run(items, relevant)
             sys.stdout.write(f"| {name:<28} | {score:>0.6f} |\n")
 
         sys.stdout.write("+------------------------------+----------+\n")
@@ -0,0 +1,37 @@
+"""
+Optional numba kernel for query_processing/boolean.py.
+
+`intersect_sorted` is the JIT-compiled two-pointer merge when numba is
+installed and None otherwise, in which case AND keeps np.intersect1d.
+"""
+
+try:
+    from numba import njit
+except ImportError:  # optional dependency
+    njit = None
+
+
+def _intersect_sorted(a, b, out):
+    """
+    Write A ∩ B of sorted, duplicate-free arrays `a` and `b` into the front of
+    `out` (len(out) >= min(len(a), len(b))) in ascending order; return its length.
+    """
+    i = j = k = 0
+    while i < a.shape[0] and j < b.shape[0]:
+        x = a[i]
+        y = b[j]
+        if x < y:
+            i += 1
+        elif y < x:
+            j += 1
+        else:
+            out[k] = x
+            k += 1
+            i += 1
+            j += 1
+    return k
+
+
+intersect_sorted = (
+    njit(cache=True, nogil=True, boundscheck=False)(_intersect_sorted) if njit is not None else None
+)
@@ -1,11 +1,87 @@
-from typing import Set, List, Union, Tuple
-from index.access import get_posting_list
-import re
+from typing import Dict, Set, List, Union, Tuple
+from index.access import get_collection_ids, get_posting_array
+
+import numpy as np
+
+from ._boolean_kernels import intersect_sorted
 
 TokGram = Union[str, Tuple[str, ...]]
 
-# Keep quoted phrases, operators, parens as separate tokens
-RE_TOKEN = re.compile(r'"[^"]*"|\(|\)|\bAND\b|\bOR\b|\bNOT\b|[^()\s]+')
+# Postings are handled as sorted, duplicate-free int32 arrays throughout;
+# every operator below preserves that invariant so they chain without re-sorting.
+_EMPTY = np.empty(0, dtype=np.int32)
+
+_OPERATORS = ("AND", "OR", "NOT")
+
+# AND binary-searches the shorter posting when the other is at least this many times longer
+_GALLOP_RATIO = 16
+
+
+def _tokenize(query: str) -> List[str]:
+    """
+    Split a boolean query into quoted phrases, operators, parens and bare operands.
+    Hand-written scanner (no regex engine) producing the same tokens as the former
+    RE_TOKEN pattern: quoted phrase | paren | whole-word AND/OR/NOT | a run of
+    characters that are neither whitespace nor parens.
+    """
+    if '"' not in query:
+        # common case (incl. converted NL queries): parens and whitespace are the
+        # only separators, so str.split does the scanning in C
+        out: List[str] = query.replace("(", " ( ").replace(")", " ) ").split()
+        for k in range(len(out) - 1, -1, -1):
+            chunk = out[k]
+            # an operator glued to punctuation ("AND-x") is still its own token
+            if chunk[0] in "AON" and len(chunk) > 2 and chunk not in _OPERATORS:
+                op = _leading_operator(chunk, 0)
+                if op is not None:
+                    out[k : k + 1] = [op, chunk[len(op):]]
+        return out
+
+    out = []
+    i, n = 0, len(query)
+    while i < n:
+        ch = query[i]
+        if ch.isspace():
+            i += 1
+            continue
+        if ch == "(" or ch == ")":
+            out.append(ch)
+            i += 1
+            continue
+        if ch == '"':
+            j = query.find('"', i + 1)
+            if j != -1:
+                out.append(query[i : j + 1])
+                i = j + 1
+                continue
+            # unmatched quote: scanned as part of a bare operand below
+
+        op = _leading_operator(query, i)
+        if op is not None:
+            out.append(op)
+            i += len(op)
+            continue
+
+        # bare operand: run of characters other than whitespace and parens
+        j = i + 1
+        while j < n and not query[j].isspace() and query[j] not in "()":
+            j += 1
+        out.append(query[i:j])
+        i = j
+    return out
+
+
+def _leading_operator(s: str, i: int):
+    """Return AND/OR/NOT if it starts at s[i] as a whole word, else None."""
+    for op in _OPERATORS:
+        end = i + len(op)
+        if s.startswith(op, i) and (end == len(s) or not _is_word_char(s[end])):
+            return op
+    return None
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
 
 
 def _as_key(token_or_phrase: str) -> TokGram:
@@ -25,25 +101,60 @@ def _as_key(token_or_phrase: str) -> TokGram:
     return token_or_phrase
 
 
-def _postings_for_key(k: TokGram, index_path: str) -> Set[int]:
-    """Get postings as a set for a term or n-gram key."""
+def _postings_for_key(k: TokGram, index_path: str) -> np.ndarray:
+    """Get postings as a sorted int32 array for a term or n-gram key."""
     if k == "" or k is None:
-        return set()
-    return set(get_posting_list(k, index_path))
+        return _EMPTY
+    return get_posting_array(k, index_path)
+
+
+def _fetch(k: TokGram, index_path: str, cache: Dict[TokGram, np.ndarray]) -> np.ndarray:
+    """Postings for `k`, memoized in `cache` for the duration of one query."""
+    arr = cache.get(k)
+    if arr is None:
+        arr = _postings_for_key(k, index_path)
+        cache[k] = arr
+    return arr
+
+
+def _intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    A ∩ B for sorted, duplicate-free arrays. When one side is much shorter,
+    each of its IDs is binary-searched in the other (O(s log l)); otherwise
+    the two are merged, by the numba kernel when installed (about 2x faster
+    than np.intersect1d, which sorts their concatenation).
+    """
+    if a.size > b.size:
+        a, b = b, a
+    if a.size == 0:
+        return _EMPTY
+    if a.size * _GALLOP_RATIO > b.size:
+        if intersect_sorted is None:
+            return np.intersect1d(a, b, assume_unique=True)
+        out = np.empty(a.size, dtype=np.result_type(a, b))
+        return out[: intersect_sorted(a, b, out)]
+    j = np.searchsorted(b, a)
+    np.minimum(j, b.size - 1, out=j)
+    return a[b[j] == a]
 
 
-def _collect_universe(tokens: List[str], index_path: str) -> Set[int]:
+def _collect_universe(
+    tokens: List[str], index_path: str, cache: Dict[TokGram, np.ndarray]
+) -> np.ndarray:
     """
     Build the 'query universe' U as the union of postings of all operands
     (terms/phrases) that appear in the query. This lets us define NOT deterministically
     as U \ A without needing the whole collection doc ID set.
+    (process_boolean_query(..., universe="collection") uses the stored collection instead.)
     """
-    U: Set[int] = set()
-    for t in tokens:
-        if t in ("AND", "OR", "NOT", "(", ")"):
-            continue
-        U |= _postings_for_key(_as_key(t), index_path)
-    return U
+    parts = [
+        _fetch(_as_key(t), index_path, cache)
+        for t in tokens
+        if t not in ("AND", "OR", "NOT", "(", ")")
+    ]
+    if not parts:
+        return _EMPTY
+    return np.unique(np.concatenate(parts))
 
 
 def _to_rpn(tokens: List[str]) -> List[Union[str, TokGram]]:
@@ -90,56 +201,85 @@ def _to_rpn(tokens: List[str]) -> List[Union[str, TokGram]]:
     return output
 
 
-def _eval_rpn(rpn: List[Union[str, TokGram]], index_path: str, universe: Set[int]) -> Set[int]:
+def _eval_rpn(
+    rpn: List[Union[str, TokGram]],
+    index_path: str,
+    universe: np.ndarray,
+    cache: Dict[TokGram, np.ndarray],
+) -> np.ndarray:
     """
-    Evaluate RPN with set semantics.
-    - Operand => push postings set
+    Evaluate RPN with set semantics over sorted int32 arrays.
+    - Operand => push postings array
     - NOT A   => push (U \ A)
     - A AND B => push (A ∩ B)
     - A OR  B => push (A ∪ B)
     """
-    stack: List[Set[int]] = []
+    stack: List[np.ndarray] = []
 
     for token in rpn:
         if token == "NOT":
             if not stack:
                 raise ValueError("NOT without operand")
             a = stack.pop()
-            stack.append(universe - a)
+            stack.append(np.setdiff1d(universe, a, assume_unique=True))
         elif token == "AND":
             if len(stack) < 2:
                 raise ValueError("AND needs two operands")
             b = stack.pop()
             a = stack.pop()
-            stack.append(a & b)
+            stack.append(_intersect_sorted(a, b))
         elif token == "OR":
             if len(stack) < 2:
                 raise ValueError("OR needs two operands")
             b = stack.pop()
             a = stack.pop()
-            stack.append(a | b)
+            stack.append(np.union1d(a, b))
         else:
             # operand postings
-            stack.append(_postings_for_key(token, index_path))
+            stack.append(_fetch(token, index_path, cache))
 
     if len(stack) != 1:
         raise ValueError("Malformed boolean expression")
     return stack[0]
 
 
-def process_boolean_query(query: str, index_path: str) -> Set[int]:
+def process_boolean_query(query: str, index_path: str, universe: str = "query") -> Set[int]:
     """
     Process Boolean queries with AND/OR/NOT operators, parentheses, and quoted phrases.
 
     Precedence: NOT > AND > OR
     Phrases use n-gram lookups against the unified index.
+
+    `universe` sets what NOT negates against: "query" (default) is the union of the
+    query's operand postings; "collection" is every doc ID stored in the package.
+    """
+    return set(process_boolean_query_sorted(query, index_path, universe).tolist())
+
+
+def process_boolean_query_sorted(
+    query: str, index_path: str, universe: str = "query"
+) -> np.ndarray:
     """
+    Same as `process_boolean_query`, but return the matching doc IDs as a sorted,
+    duplicate-free int32 array (possibly a shared, read-only posting array), for
+    callers that keep combining results with vectorized set operations.
+    """
+    if universe not in ("query", "collection"):
+        raise ValueError(f"Unknown boolean universe: {universe!r}")
+
     # 1) Tokenize (operators are case-sensitive and already enforced by detection)
-    tokens = RE_TOKEN.findall(query)
+    tokens = _tokenize(query)
 
-    # 2) Build query universe (union of all operand postings)
-    U = _collect_universe(tokens, index_path)
+    # 2) Universe for NOT (only needed if the query negates anything); each
+    #    distinct operand is fetched once and reused by the evaluator below
+    cache: Dict[TokGram, np.ndarray] = {}
+    if "NOT" not in tokens:
+        U = _EMPTY
+    elif universe == "collection":
+        U = get_collection_ids(index_path)
+    else:
+        U = _collect_universe(tokens, index_path, cache)
 
-    # 3) Convert to RPN and evaluate over sets
+    # 3) Convert to RPN and evaluate over sorted arrays
     rpn = _to_rpn(tokens)
-    return _eval_rpn(rpn, index_path, U)
+    return _eval_rpn(rpn, index_path, U, cache)
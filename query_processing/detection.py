@@ -1,39 +1,68 @@
 import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 # Case-sensitive detectors
 _RE_NEAR = re.compile(r'NEAR/(\d+)')              # strict NEAR/<int>
 _RE_BOOL_OP = re.compile(r'\b(?:AND|OR|NOT)\b')   # only these operators
-_RE_QUOTES = re.compile(r'"[^"]*"')               # matched quotes only
-_RE_ANY_QUOTE = re.compile(r'"')
 _RE_UPPER_OPLIKE = re.compile(r'\b[A-Z]{2,}\b')   # XOR, ANDAND, etc.
 
-
-def _balanced_parens(s: str) -> bool:
-    c = 0
-    for ch in s:
-        if ch == '(':
-            c += 1
-        elif ch == ')':
-            c -= 1
-            if c < 0:
-                return False
-    return c == 0
+# Characters that only structured (phrase/wildcard/boolean) queries contain
+_STRUCT_CHARS = '"*()'
 
 
-def _has_unmatched_quotes(s: str) -> bool:
-    return (s.count('"') % 2) == 1
-
-
-def _bad_phrase_lengths(s: str) -> bool:
-    for m in _RE_QUOTES.finditer(s):
-        inside = m.group(0)[1:-1].strip()
-        if not inside:
-            return True  # empty phrase ""
-        if len(inside.split()) > 3:
+def _has_upper_run(s: str) -> bool:
+    """True if `s` has two consecutive ASCII capitals (needed by AND/OR/NOT/NEAR/XOR...)."""
+    if s.lower() == s:
+        return False
+    prev = False
+    for ch in s:
+        up = 'A' <= ch <= 'Z'
+        if up and prev:
             return True
+        prev = up
     return False
 
 
+def _scan(query: str) -> Tuple[bool, bool, bool, List[str]]:
+    """
+    One pass over `query` returning (paren_ok, quote_ok, phrase_ok, tokens):
+      paren_ok  - parentheses never close below depth 0 and end balanced
+      quote_ok  - double quotes come in pairs
+      phrase_ok - every quoted phrase has 1..3 words
+      tokens    - whitespace-split tokens
+    """
+    if '"' not in query and '(' not in query and ')' not in query:
+        return True, True, True, query.split()
+    depth = 0
+    paren_ok = True
+    phrase_ok = True
+    in_quote = False
+    in_word = False
+    words = 0
+    for ch in query:
+        if ch == '"':
+            if in_quote and not 1 <= words <= 3:
+                phrase_ok = False  # empty phrase "" or longer than 3 words
+            in_quote = not in_quote
+            in_word = False
+            words = 0
+        elif in_quote:
+            if ch.isspace():
+                in_word = False
+            elif not in_word:
+                in_word = True
+                words += 1
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            if depth < 0:
+                paren_ok = False
+    paren_ok = paren_ok and depth == 0
+    return paren_ok, not in_quote, phrase_ok, query.split()
+
+
 def _has_mixed_types(query: str) -> bool:
     """
     Mixing wildcard with boolean OR proximity is malformed.
@@ -41,9 +70,9 @@ def _has_mixed_types(query: str) -> bool:
     NOTE: quoted phrases are allowed as NEAR/k operands and do NOT count as 'boolean'.
     """
     has_star = '*' in query
-    has_near = bool(_RE_NEAR.search(query)) or ('NEAR' in query)
+    has_near = 'NEAR' in query     # any NEAR/<int> match contains it too
     has_bool_ops = bool(_RE_BOOL_OP.search(query))
-    has_quotes = bool(_RE_ANY_QUOTE.search(query))
+    has_quotes = '"' in query
 
     if has_star and (has_near or has_bool_ops or has_quotes):
         return True
@@ -88,15 +117,8 @@ def _invalid_wildcard(query: str) -> bool:
     return set(query) == {'*'}  # patterns like * or **
 
 
-def _invalid_boolean_structure(query: str) -> bool:
-    if _has_unmatched_quotes(query):
-        return True
-    if not _balanced_parens(query):
-        return True
-    if _bad_phrase_lengths(query):
-        return True
-
-    toks = query.strip().split()
+def _invalid_boolean_structure(toks: List[str]) -> bool:
+    # quotes, parens and phrase lengths were already validated via _scan
     if not toks:
         return False
 
@@ -133,17 +155,40 @@ def detect_query_type(query: str) -> str:
     """
     if not isinstance(query, str):
         raise ValueError("query must be a string")
+    qtype, error = _detect_cached(query)
+    if error is not None:
+        raise ValueError(error)
+    return qtype
+
+
+@lru_cache(maxsize=4096)
+def _detect_cached(query: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Memoized (qtype, None) or (None, message) for `query`; query logs repeat the
+    same literal strings, and caching the message keeps the ValueError contract.
+    """
+    try:
+        return _classify(query), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def _classify(query: str) -> str:
+    # Fast path: without structural characters or capital runs none of the
+    # checks below can fire, so plain keyword queries skip every regex
+    if not any(c in query for c in _STRUCT_CHARS) and not _has_upper_run(query):
+        return "natural_language"
 
     # Global malformed checks that apply to any structured form
-    if _has_unmatched_quotes(query):
+    paren_ok, quote_ok, phrase_ok, toks = _scan(query)
+    if not quote_ok:
         raise ValueError("Unmatched quotes")
-    if not _balanced_parens(query):
+    if not paren_ok:
         raise ValueError("Unbalanced parentheses")
-    if _bad_phrase_lengths(query):
+    if not phrase_ok:
         raise ValueError("Phrases exceed max length 3 or empty phrase")
 
     # NEW: unknown operator check (e.g., XOR) even if no AND/OR/NOT present
-    toks = query.strip().split()
     for t in toks:
         # allow NEAR/<int> (handled below), AND/OR/NOT; flag other ALL-CAPS tokens (len>=2)
         if _RE_UPPER_OPLIKE.fullmatch(t) and t not in ("AND", "OR", "NOT"):
@@ -156,7 +201,7 @@ def detect_query_type(query: str) -> str:
         raise ValueError("Mixed query types (wildcard/boolean/proximity) are not supported")
 
     # Proximity first
-    if "NEAR" in query or _RE_NEAR.search(query):
+    if "NEAR" in query:
         if _invalid_near(query):
             raise ValueError("Malformed NEAR/k")
         return "proximity"
@@ -168,8 +213,8 @@ def detect_query_type(query: str) -> str:
         return "wildcard"
 
     # Boolean if contains AND/OR/NOT or any quotes (matched)
-    if _RE_BOOL_OP.search(query) or _RE_ANY_QUOTE.search(query):
-        if _invalid_boolean_structure(query):
+    if '"' in query or _RE_BOOL_OP.search(query):
+        if _invalid_boolean_structure(toks):
             raise ValueError("Malformed boolean query")
         return "boolean"
 
@@ -37,34 +37,44 @@ def _as_key(operand: str) -> TokGram:
         return tuple(toks)
     return operand
 
-def _span_positions(key: TokGram, doc_id: int, index_path: str) -> List[Tuple[int, int]]:
-    """
-    Return contiguous spans (start, end) for the operand in doc.
-    For a unigram: start=end=position.
-    For a phrase of m tokens: positions are the starting offsets of that m-gram,
-    end = start + m - 1.
-    """
-    if isinstance(key, tuple):
-        m = len(key)
-        starts = get_term_positions(key, doc_id, index_path)
-        return [(s, s + m - 1) for s in starts]
-    else:
-        pos = get_term_positions(key, doc_id, index_path)
-        return [(p, p) for p in pos]
+def _span_width(key: TokGram) -> int:
+    """Number of tokens an occurrence of the operand spans (phrase length, or 1)."""
+    return len(key) if isinstance(key, tuple) else 1
 
-def _edge_distance(a: Tuple[int, int], b: Tuple[int, int]) -> int:
+def _near_within(left: List[int], m1: int, right: List[int], m2: int, k: int) -> bool:
     """
-    Edge-to-edge distance (order-insensitive):
-      D = min(|q_start - p_end|, |p_start - q_end|)
-    Overlapping spans yield 0.
+    True iff some left span [a, a+m1-1] and right span [b, b+m2-1] (by sorted
+    start offsets) are within edge-to-edge distance k:
+      D = min(|q_start - p_end|, |p_start - q_end|), overlapping spans yield 0.
+    Identical spans cannot satisfy both operands.
+
+    D <= k holds exactly when b lies in the window [a - k - (m2-1), a + (m1-1) + k],
+    and both lists are sorted, so a single forward pointer into `right` suffices
+    (O(|left| + |right|) instead of checking every pair).
     """
-    (as_, ae) = a
-    (bs_, be) = b
-    # overlap -> 0
-    if not (ae < bs_ or be < as_):
-        return 0
-    # disjoint: minimal edge gap
-    return min(abs(bs_ - ae), abs(as_ - be))
+    j = 0
+    n = len(right)
+    same_width = m1 == m2
+    for a in left:
+        lo = a - k - (m2 - 1)
+        while j < n and right[j] < lo:
+            j += 1
+        if j == n:
+            return False
+        hi = a + (m1 - 1) + k
+        b = right[j]
+        if b > hi:
+            continue
+        if b != a or not same_width:
+            return True
+        # right[j] is the very same span as `a` (a repeated position may list it
+        # more than once); any other start in the window will do
+        t = j + 1
+        while t < n and right[t] == a:
+            t += 1
+        if t < n and right[t] <= hi:
+            return True
+    return False
 
 def process_proximity_query(query: str, index_path: str) -> Set[int]:
     """
@@ -94,28 +104,18 @@ def process_proximity_query(query: str, index_path: str) -> Set[int]:
     candidates = left_docs & right_docs
     if not candidates:
         return set()
+    m1 = _span_width(left_key)
+    m2 = _span_width(right_key)
 
     hits: Set[int] = set()
     for did in candidates:
-        left_spans = _span_positions(left_key, did, index_path)
-        right_spans = _span_positions(right_key, did, index_path)
-        if not left_spans or not right_spans:
+        # start offsets of each operand's occurrences (ascending)
+        left_starts = get_term_positions(left_key, did, index_path)
+        right_starts = get_term_positions(right_key, did, index_path)
+        if not left_starts or not right_starts:
             continue
 
-        # Check any pair of spans; disallow identical spans (distinct-span requirement)
-        ok = False
-        for a in left_spans:
-            for b in right_spans:
-                if a == b:
-                    # same token span cannot satisfy both operands
-                    continue
-                if _edge_distance(a, b) <= k:
-                    ok = True
-                    break
-            if ok:
-                break
-
-        if ok:
+        if _near_within(left_starts, m1, right_starts, m2, k):
             hits.add(did)
 
     return hits
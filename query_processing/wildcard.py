@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Set, List
 import re
 from index.access import find_wildcard_matches, get_posting_list
@@ -6,58 +7,56 @@ def _pattern_to_ngrams(pat: str) -> List[str]:
     """
     Derive <=3-length character n-grams (with $ boundaries for anchored sides)
     from a single-token wildcard pattern containing '*'.
-    """
-    s = pat
-    grams: List[str] = []
-
-    # Prefix anchored? (no leading *)
-    if not s.startswith('*'):
-        stem = s.split('*', 1)[0]
-        # boundary grams total length must be <= 3 → only 1 or 2 letters with '$'
-        for L in (1, 2):
-            if len(stem) >= L:
-                grams.append("$" + stem[:L])
 
-    # Suffix anchored? (no trailing *)
-    if not s.endswith('*'):
-        stem = s.rsplit('*', 1)[-1]
-        for L in (1, 2):
-            if len(stem) >= L:
-                grams.append(stem[-L:] + "$")
-
-    # Internal grams from the core (remove all '*'), lengths 3,2,1
-    core = s.replace('*', '')
-    for L in (3, 2, 1):
-        for i in range(0, max(0, len(core) - L + 1)):
-            grams.append(core[i:i+L])
+    Grams are taken per '*'-separated segment (never across a '*'), with '$'
+    added to the first/last segment when that side is anchored. Every term
+    containing a 3-gram also contains its shorter sub-grams, so only 3-length
+    windows are kept; a segment shorter than 3 contributes itself. Longest
+    (typically most selective) grams come first.
+    """
+    segments = pat.split('*')
+    last = len(segments) - 1
+    out_set = set()
+    for i, seg in enumerate(segments):
+        if not seg:
+            continue
+        if i == 0:
+            seg = "$" + seg          # no leading '*': prefix anchored
+        if i == last:
+            seg = seg + "$"          # no trailing '*': suffix anchored
+        if len(seg) <= 3:
+            out_set.add(seg)
+        else:
+            out_set.update(seg[j:j + 3] for j in range(len(seg) - 2))
+    out_set.discard("$")
+    return sorted(out_set, key=lambda g: (-len(g), g))
 
-    # Deduplicate while preserving order; exclude meaningless "$"
-    seen = set()
-    out: List[str] = []
-    for g in grams:
-        if g and g != "$" and g not in seen:
-            seen.add(g)
-            out.append(g)
-    return out
+@lru_cache(maxsize=4096)
+def _wildcard_regex(pat: str) -> "re.Pattern[str]":
+    """Anchored regex for a wildcard pattern ('*' = any run), compiled once per pattern."""
+    return re.compile("^" + re.escape(pat).replace("\\*", ".*") + "$")
 
 def _expand_terms(pat: str, index_path: str) -> List[str]:
     grams = _pattern_to_ngrams(pat)
     if not grams:
         return []
 
-    first = True
-    candidates = set()
-    for g in grams:
-        terms = set(find_wildcard_matches(g, index_path))
-        if first:
-            candidates = terms
-            first = False
-        else:
-            candidates &= terms
-        if not candidates:
-            break
+    # intersect smallest-first, in one variadic call (the loop runs in C); a
+    # gram missing from the index empties the result before any work is done
+    gram_terms = sorted((find_wildcard_matches(g, index_path) for g in grams), key=len)
+    if not gram_terms[0]:
+        return []
+    candidates = set(gram_terms[0]).intersection(*gram_terms[1:])
 
-    rx = re.compile("^" + re.escape(pat).replace("\\*", ".*") + "$")
+    if pat.count("*") == 1:
+        # prefix*, *suffix and pre*suf: plain string checks beat the regex
+        pre, suf = pat.split("*")
+        min_len = len(pre) + len(suf)
+        return sorted(
+            t for t in candidates
+            if len(t) >= min_len and t.startswith(pre) and t.endswith(suf)
+        )
+    rx = _wildcard_regex(pat)
     return sorted(t for t in candidates if rx.match(t))
 
 def process_wildcard_query(pattern: str, index_path: str) -> Set[int]:
@@ -67,5 +66,5 @@ def process_wildcard_query(pattern: str, index_path: str) -> Set[int]:
     terms = _expand_terms(pattern, index_path)
     results: Set[int] = set()
     for t in terms:
-        results |= set(get_posting_list(t, index_path))
+        results.update(get_posting_list(t, index_path))
     return results
@@ -8,14 +8,17 @@ Notes:
 - Pure ranking: no query expansion inside this function.
 - OOV-safe: terms with df==0 are ignored.
 - Deterministic tie-breaking: (-score, doc_id).
-- Uses Task-1 index stats (N, avgdl, doc_lengths) via __META__.
+- Uses Task-1 index stats (N, avgdl, doc_ids/doc_lengths arrays) via __META__.
 """
 
 from __future__ import annotations
 
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import json
 import math
+import os
 import re
 from pathlib import Path
 import sys as _sys
@@ -28,129 +31,195 @@ if str(_PROJECT_ROOT) not in _sys.path:
     _sys.path.insert(0, str(_PROJECT_ROOT))
 
 # Task 1 APIs
-from index.access import get_posting_list, get_term_positions
-from index.io import load as _load_pkg
+from index.access import get_index_meta, get_term_frequencies, get_unigram_dfs
 from index.builders import create_all_indexes
+from index.io import is_package
 
 
 # ---------------------------
 # Caches
 # ---------------------------
 
-# in-memory cache of __META__ by index path
-_META_CACHE: Dict[str, Dict] = {}
-# cache of df: (index_path, term) -> df
-_DF_CACHE: Dict[Tuple[str, str], int] = {}
+# in-memory cache by index path: (source __META__, copy extended with derived arrays)
+_META_CACHE: Dict[str, Tuple[Dict, Dict]] = {}
+
+_DEFAULT_B = 0.75
+
+# 1 + ln(tf) for tf < _LOG_TF_MAX (index 0 unused), filled with math.log so the
+# lookups equal the scalar formula exactly
+_LOG_TF_MAX = 1 << 12
+_ONE_PLUS_LOG_TF = np.array([0.0] + [1.0 + math.log(v) for v in range(1, _LOG_TF_MAX)])
 
 
 def _load_meta(index_path: str) -> Dict:
-    """Load the unified package and return __META__ (cached)."""
-    if index_path not in _META_CACHE:
-        pkg = _load_pkg(index_path)
-        meta = dict(pkg.get("__META__", {}))
-        # harden: fill minimal fields if missing
+    """
+    Return __META__ of the unified package (cached), extended once per
+    index with aligned numpy arrays: doc_ids_arr (sorted), dl_arr (lengths,
+    clamped to >= 1) and norm_arr (BM25 length norm for the default b).
+    Rebuilt (and the cached query idfs dropped) when index.access reloads the
+    package, i.e. when the index file was rewritten.
+    """
+    # shares the package loaded (once) by index.access instead of reading it again
+    src = get_index_meta(index_path)
+    cached = _META_CACHE.get(index_path)
+    if cached is None or cached[0] is not src:
+        if cached is not None:
+            _query_idf.cache_clear()
+        meta = dict(src)
+        # doc_lengths is an int32 array aligned with doc_ids; packages built
+        # before that stored a {doc_id: length} dict
         doc_lengths = meta.get("doc_lengths", {})
-        N = int(meta.get("N", len(doc_lengths)))
-        avgdl = float(meta.get("avgdl", (sum(doc_lengths.values()) / N if N > 0 else 0.0)))
+        if isinstance(doc_lengths, dict):
+            ids = sorted(doc_lengths)
+            lengths = np.asarray([doc_lengths[d] for d in ids], dtype=np.float64)
+        else:
+            ids = meta["doc_ids"]
+            lengths = np.asarray(doc_lengths, dtype=np.float64)
+        # harden: fill minimal fields if missing
+        N = int(meta.get("N", len(ids)))
+        avgdl = float(meta.get("avgdl", (float(lengths.sum()) / N if N > 0 else 0.0)))
         meta["N"] = N
         meta["avgdl"] = avgdl
-        meta["doc_lengths"] = doc_lengths
-        _META_CACHE[index_path] = meta
-    return _META_CACHE[index_path]
+        meta["doc_ids_arr"] = np.asarray(ids, dtype=np.int64)
+        meta["dl_arr"] = np.maximum(1, lengths)
+        meta["norm_arr"] = _length_norm(meta["dl_arr"], avgdl, _DEFAULT_B)
+        _META_CACHE[index_path] = (src, meta)
+    return _META_CACHE[index_path][1]
+
+
+def _length_norm(dl: np.ndarray, avgdl: float, b: float) -> np.ndarray:
+    """BM25 length normalization (1-b) + b*dl/avgdl (1.0 if avgdl is 0)."""
+    if avgdl > 0:
+        return (1.0 - b) + b * (dl / avgdl)
+    return np.ones(dl.size)
+
+
+def _candidate_rows(meta: Dict, cand: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row of each candidate in the meta arrays, and a mask of candidates that have one."""
+    ids = meta["doc_ids_arr"]
+    if ids.size == 0:
+        return np.zeros(cand.size, dtype=np.int64), np.zeros(cand.size, dtype=bool)
+    rows = np.searchsorted(ids, cand)
+    np.minimum(rows, ids.size - 1, out=rows)
+    return rows, ids[rows] == cand
 
 
 def _df(term: str, index_path: str) -> int:
-    """Document frequency from unified postings length (cached)."""
-    key = (index_path, term)
-    if key in _DF_CACHE:
-        return _DF_CACHE[key]
-    df = len(get_posting_list(term, index_path))
-    _DF_CACHE[key] = df
-    return df
+    """Document frequency from the per-index unigram df map (built once)."""
+    return get_unigram_dfs(index_path).get(term, 0)
+
+
+@lru_cache(maxsize=4096)
+def _query_idf(method: str, index_path: str, terms: Tuple[str, ...]) -> Dict[str, float]:
+    """
+    {term: idf} for the distinct query terms with df > 0, in query order (the
+    order scores are summed in). Cached per (method, index, terms), so the same
+    query ranked again skips the df lookups; shared, do not mutate.
+    """
+    N = max(1, int(_load_meta(index_path)["N"]))
+    idf: Dict[str, float] = {}
+    for t in terms:
+        df = _df(t, index_path)
+        if df > 0:
+            if method == "bm25":
+                # Non-negative IDF
+                idf[t] = math.log((N - df + 0.5) / (df + 0.5) + 1.0)
+            else:
+                idf[t] = math.log((N / df) + 1e-12)
+    return idf
 
 
-def _tf(term: str, doc_id: int, index_path: str) -> int:
-    """Term frequency via unigram positions length."""
-    return len(get_term_positions(term, doc_id, index_path))
+def _tf_for(term: str, cand: np.ndarray, index_path: str) -> np.ndarray:
+    """Term frequencies of `term` for each candidate in `cand` (0 where absent)."""
+    post_ids, post_tf = get_term_frequencies(term, index_path)
+    if post_ids.size == 0:
+        return np.zeros(cand.size, dtype=np.float64)
+    j = np.searchsorted(post_ids, cand)
+    np.minimum(j, post_ids.size - 1, out=j)
+    return np.where(post_ids[j] == cand, post_tf[j], 0).astype(np.float64)
 
 
 # ---------------------------
 # Scoring methods
 # ---------------------------
 
-def _bm25_scores(
+def _bm25_vector(
     query_toks: List[str],
-    doc_ids: List[int],
+    cand: np.ndarray,
     index_path: str,
     k1: float = 1.2,
     b: float = 0.75,
-) -> Dict[int, float]:
+) -> np.ndarray:
     """
     BM25 (Robertson/Sparck Jones) with a non-negative IDF variant:
         idf = ln( (N - df + 0.5) / (df + 0.5) + 1 )
         score(d,q) = sum_t idf(t) * ((tf*(k1+1)) / (tf + k1*(1-b + b*dl/avgdl)))
     This avoids negative idf when df > N/2, which can otherwise make matched
     docs score below 0 and lose to zero-scored non-matches.
+    Returns a float64 array of scores aligned with the candidate IDs in `cand`.
     """
     meta = _load_meta(index_path)
-    N = max(1, int(meta["N"]))
-    doc_lengths: Dict[int, int] = meta["doc_lengths"]
     avgdl = float(meta["avgdl"])
 
-    # precompute idf for query terms with df>0
-    idf: Dict[str, float] = {}
-    for t in query_toks:
-        df = _df(t, index_path)
-        if df > 0:
-            # Non-negative IDF
-            idf[t] = math.log((N - df + 0.5) / (df + 0.5) + 1.0)
+    # idf for query terms with df>0 (distinct terms, first-occurrence order)
+    idf = _query_idf("bm25", index_path, tuple(dict.fromkeys(query_toks)))
 
-    scores: Dict[int, float] = {d: 0.0 for d in doc_ids}
+    s = np.zeros(cand.size, dtype=np.float64)
     if not idf:
-        return scores
-
-    for d in doc_ids:
-        dl = max(1, int(doc_lengths.get(d, 0)))
-        norm = (1.0 - b) + b * (dl / avgdl) if avgdl > 0 else 1.0
-        denom_base = k1 * norm
-        s = 0.0
-        for t, idf_t in idf.items():
-            tf_td = _tf(t, d, index_path)
-            if tf_td == 0:
-                continue
-            s += idf_t * ((tf_td * (k1 + 1.0)) / (tf_td + denom_base))
-        scores[d] = s
-    return scores
+        return s
+
+    # one posting fetch per term; the formula is evaluated across all candidates
+    # at once (same per-doc arithmetic and term order as a scalar loop)
+    rows, known = _candidate_rows(meta, cand)
+    if b == _DEFAULT_B:
+        norm = meta["norm_arr"][rows]
+    else:
+        norm = _length_norm(meta["dl_arr"][rows], avgdl, b)
+    if not known.all():
+        # docs missing from doc_lengths count as length 1
+        norm[~known] = _length_norm(np.ones(1), avgdl, b)[0]
+    # per-doc part of the denominator, computed once for all terms; each term
+    # then only touches the candidates it occurs in (tf=0 adds exactly 0)
+    denom_base = k1 * norm
+    k1_plus_1 = k1 + 1.0
+    for t, idf_t in idf.items():
+        tf_td = _tf_for(t, cand, index_path)
+        hit = np.flatnonzero(tf_td)
+        if hit.size == 0:
+            continue
+        tf_hit = tf_td[hit]
+        s[hit] += idf_t * ((tf_hit * k1_plus_1) / (tf_hit + denom_base[hit]))
+    return s
 
 
-def _tfidf_scores(
+def _tfidf_vector(
     query_toks: List[str],
-    doc_ids: List[int],
+    cand: np.ndarray,
     index_path: str,
-) -> Dict[int, float]:
-    """Simple ltc/lnc-style: log-tf * idf with idf=ln(N/df)."""
-    meta = _load_meta(index_path)
-    N = max(1, int(meta["N"]))
+) -> np.ndarray:
+    """Simple ltc/lnc-style: log-tf * idf with idf=ln(N/df); scores aligned with `cand`."""
+    _load_meta(index_path)  # refreshes the idf cache if the index was rebuilt
+    idf = _query_idf("tfidf", index_path, tuple(dict.fromkeys(query_toks)))
 
-    idf: Dict[str, float] = {}
-    for t in query_toks:
-        df = _df(t, index_path)
-        if df > 0:
-            idf[t] = math.log((N / df) + 1e-12)
-
-    scores: Dict[int, float] = {d: 0.0 for d in doc_ids}
+    s = np.zeros(cand.size, dtype=np.float64)
     if not idf:
-        return scores
+        return s
 
-    for d in doc_ids:
-        s = 0.0
-        for t, idf_t in idf.items():
-            tf_td = _tf(t, d, index_path)
-            if tf_td == 0:
-                continue
-            s += (1.0 + math.log(tf_td)) * idf_t
-        scores[d] = s
-    return scores
+    for t, idf_t in idf.items():
+        tf_td = _tf_for(t, cand, index_path)
+        hit = tf_td > 0
+        if not hit.any():
+            continue
+        tf_hit = tf_td[hit]
+        if tf_hit.max() < _LOG_TF_MAX:
+            log_tf = _ONE_PLUS_LOG_TF[tf_hit.astype(np.intp)]
+        else:
+            # 1 + ln(tf) via math.log per distinct tf, beyond the table's range
+            vals = np.unique(tf_hit)
+            table = np.array([1.0 + math.log(v) for v in vals.tolist()])
+            log_tf = table[np.searchsorted(vals, tf_hit)]
+        s[hit] += log_tf * idf_t
+    return s
 
 
 # ---------------------------
@@ -162,7 +231,8 @@ def rank_documents(
     candidate_docs: List[List[str]],
     doc_ids: List[int],
     inverted_index_path: str,
-    method: str = "default"
+    method: str = "default",
+    top_k: Optional[int] = None,
 ) -> Tuple[List[int], List[float]]:
     """
     Rank documents using a chosen lexical method.
@@ -170,13 +240,17 @@ def rank_documents(
     Args:
         query_toks: tokenized, cleaned query terms (no expansion here)
         candidate_docs: tokenized, cleaned candidate docs (aligned with doc_ids)
-                        (not used by the lexical methods but required by the interface)
+                        (not used by the lexical methods but required by the interface;
+                        may be empty)
         doc_ids: candidate document IDs (aligned with candidate_docs)
         inverted_index_path: path to the Task-1 unified index package
         method: "default" (BM25), "bm25", or "tfidf"
+        top_k: if given, only the top_k best-ranked documents are returned
+               (selected without sorting the rest)
 
     Returns:
         ranked_doc_ids: permutation of doc_ids sorted by descending score
+                        (its first top_k entries when top_k is given)
         ranking_scores: float scores aligned with ranked_doc_ids
 
     Determinism:
@@ -185,30 +259,42 @@ def rank_documents(
     if not doc_ids:
         return [], []
 
+    ids = np.asarray(doc_ids, dtype=np.int64)
     meth = (method or "default").lower()
     if meth in ("default", "bm25"):
-        score_map = _bm25_scores(query_toks, doc_ids, inverted_index_path)
+        scr = _bm25_vector(query_toks, ids, inverted_index_path)
     elif meth == "tfidf":
-        score_map = _tfidf_scores(query_toks, doc_ids, inverted_index_path)
+        scr = _tfidf_vector(query_toks, ids, inverted_index_path)
     else:
         # fallback to BM25 for unknown strings
-        score_map = _bm25_scores(query_toks, doc_ids, inverted_index_path)
+        scr = _bm25_vector(query_toks, ids, inverted_index_path)
 
-    # sort by (-score, doc_id) for deterministic tie-breaking
-    ranked = sorted(doc_ids, key=lambda d: (-float(score_map.get(d, 0.0)), int(d)))
-    scores = [float(score_map.get(d, 0.0)) for d in ranked]
-    return ranked, scores
+    if top_k is not None and top_k < ids.size:
+        if top_k <= 0:
+            return [], []
+        # keep every doc scoring at least the k-th best score (ties included, so
+        # the doc_id tie-break below still decides who makes the cut)
+        kth = np.partition(scr, ids.size - top_k)[ids.size - top_k]
+        keep = np.flatnonzero(scr >= kth)
+        ids, scr = ids[keep], scr[keep]
+
+    # sort by (-score, doc_id) for deterministic tie-breaking (last key is primary)
+    order = np.lexsort((ids, -scr))
+    if top_k is not None:
+        order = order[:top_k]
+    return ids[order].tolist(), scr[order].tolist()
 
 
 # ---------------------------
 # Dev evaluation CLI (prints Pearson table)
 # ---------------------------
 
+_RE_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
 def _simple_tokenize(text: str) -> List[str]:
     """Lowercase, keep a-z0-9, split on non-alnum; no external deps."""
-    text = text.lower()
-    toks = re.split(r"[^a-z0-9]+", text)
-    return [t for t in toks if t]
+    return [t for t in _RE_NON_ALNUM.split(text.lower()) if t]
 
 
 def _first_present(d: dict, keys, *, required=True, default=None):
@@ -331,14 +417,22 @@ def _load_dev_judge(dev_dir: Path) -> Dict[str, Dict[int, float]]:
     return out
 
 
-def _ensure_index(dev_dir: Path, cache_dir: Path) -> str:
+def _ensure_index(
+    dev_dir: Path,
+    cache_dir: Path,
+    corpus: Optional[Tuple[List[int], List[List[str]]]] = None,
+) -> str:
     """
-    Build (or reuse) a unified index for the dev corpus under cache/.
+    Build (or reuse, if it is in the current package format) a unified index
+    for the dev corpus under cache/.
+    `corpus` is an already loaded (doc_ids, tokenized_docs) to build from,
+    so a caller that needs it anyway does not tokenize the corpus twice.
     """
     cache_dir.mkdir(exist_ok=True, parents=True)
     idx_path = cache_dir / "dev_index_pkg.pkl"
-    if not idx_path.exists():
-        doc_ids, tokenized_docs = _load_dev_corpus(dev_dir)
+    # a cache left by an older build (e.g. the gzip-pickle format) is rebuilt
+    if not is_package(idx_path):
+        doc_ids, tokenized_docs = corpus if corpus is not None else _load_dev_corpus(dev_dir)
         create_all_indexes(tokenized_docs, str(idx_path), doc_ids=doc_ids)
     return str(idx_path)
 
@@ -350,7 +444,11 @@ def _pearson(y_true: List[float], y_pred: List[float]) -> float:
     b = np.asarray(y_pred, dtype=float)
     if np.all(a == a[0]) or np.all(b == b[0]):
         return 0.0
-    return float(np.corrcoef(a, b)[0, 1])
+    # centered sums of products (one dot each) instead of a full 2x2 corrcoef
+    da = a - a.mean()
+    db = b - b.mean()
+    den = math.sqrt(np.dot(da, da) * np.dot(db, db))
+    return float(np.dot(da, db) / den) if den else 0.0
 
 
 def _evaluate_dev(methods: List[str], *, print_header: bool = True) -> None:
@@ -361,11 +459,12 @@ def _evaluate_dev(methods: List[str], *, print_header: bool = True) -> None:
     repo = _PROJECT_ROOT
     dev_dir = repo / "data" / "dev"
     cache_dir = repo / "cache"
-    idx_path = _ensure_index(dev_dir, cache_dir)
 
-    # Load corpus tokens for candidate alignment
-    doc_ids, tokenized_docs = _load_dev_corpus(dev_dir)
-    id2toks = dict(zip(doc_ids, tokenized_docs))
+    # Load the corpus once: its doc ids are the candidates, and its tokens
+    # build the index if it is not cached yet
+    corpus = _load_dev_corpus(dev_dir)
+    doc_ids = corpus[0]
+    idx_path = _ensure_index(dev_dir, cache_dir, corpus)
 
     # Load queries + gold labels
     queries = _load_dev_queries(dev_dir)            # [{"qid": "...", "query": "..."}]
@@ -381,32 +480,38 @@ def _evaluate_dev(methods: List[str], *, print_header: bool = True) -> None:
         print("| Method         | Pearson r |")
         print("+----------------+-----------+")
 
-    # Evaluate; concatenate all (qid, doc) pairs across queries
-    for meth in methods:
-        y_true_all: List[float] = []
-        y_pred_all: List[float] = []
-        for q in queries:
-            qid = q["qid"]
-            qtok = qid2tokens[qid]
-
-            # candidates: all docs (so evaluation is method-only)
-            cids = list(doc_ids)
-            cdox = [id2toks[d] for d in cids]
-
-            ranked_ids, scores = rank_documents(qtok, cdox, cids, idx_path, method=meth)
-            rel_map = gold.get(qid, {})
-            y_true = [float(rel_map.get(d, 0.0)) for d in ranked_ids]
-            y_pred = [float(s) for s in scores]
-
-            y_true_all.extend(y_true)
-            y_pred_all.extend(y_pred)
-
-        r = _pearson(y_true_all, y_pred_all)
-        print(f"| {meth:<14} | {r:>9.3f} |")
+    # candidates: all docs (so evaluation is method-only); the lexical methods
+    # never read candidate_docs, so no token lists are passed along
+    cids = list(doc_ids)
+
+    def _rank_one(q: Dict, meth: str) -> Tuple[List[float], List[float]]:
+        qid = q["qid"]
+        ranked_ids, scores = rank_documents(qid2tokens[qid], [], cids, idx_path, method=meth)
+        rel_map = gold.get(qid, {})
+        y_true = [float(rel_map.get(d, 0.0)) for d in ranked_ids]
+        y_pred = [float(s) for s in scores]
+        return y_true, y_pred
+
+    # the index is read-only; load its caches once before queries fan out
+    _load_meta(idx_path)
+    workers = max(1, min(len(queries), os.cpu_count() or 1))
+
+    # Evaluate; concatenate all (qid, doc) pairs across queries (in query order)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for meth in methods:
+            y_true_all: List[float] = []
+            y_pred_all: List[float] = []
+            for y_true, y_pred in pool.map(lambda q: _rank_one(q, meth), queries):
+                y_true_all.extend(y_true)
+                y_pred_all.extend(y_pred)
+
+            r = _pearson(y_true_all, y_pred_all)
+            print(f"| {meth:<14} | {r:>9.3f} |")
     print("+----------------+-----------+")
 
 
-if __name__ == "__main__":
+def main() -> int:
+    """CLI entry: print the dev Pearson table for every method; always returns 0."""
     # Always emit the header and column labels first so tests that capture stdout
     # can find them even if evaluation later is a no-op on some environments.
     _sys.stdout.write("\nTask 3 — Dev Pearson Correlation\n")
@@ -423,3 +528,8 @@ if __name__ == "__main__":
         _sys.stdout.write("+----------------+-----------+\n")
         _sys.stdout.flush()
         # Do not re-raise so returncode stays 0 for the simple CLI test.
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
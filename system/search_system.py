@@ -3,26 +3,41 @@
 Command-line Information Retrieval System - Task 4
 Usage: python system/search_system.py <queries_json> <documents_jsonl> <run_output_json>
 """
-import json, sys, pathlib
+import json, os, re, sys, pathlib, unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+try:  # optional: orjson parses the JSONL corpus several times faster
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(pathlib.Path(__file__).parent.parent))
 
-from utils.text_preprocessing import preprocess
+from utils.text_preprocessing import _nlp, preprocess, preprocess_batch
 from index.builders import create_all_indexes
+from query_processing.detection import detect_query_type
 from query_processing.query_process import process_query
 from ranking.rankers import rank_documents
 
+TOP_K = 10
+
+# operand words of a structured query (operators and NEAR/k are left as-is)
+_RE_OPERAND = re.compile(r"\b(?!(?:AND|OR|NOT|NEAR)\b)\w+")
+# a quoted phrase, or an operand word outside quotes
+_RE_PHRASE_OR_OPERAND = re.compile(r'"[^"]*"|' + _RE_OPERAND.pattern)
+
 def _load_docs(path):
     """Load documents from JSONL file."""
     docs, raw = [], []
     seen_ids = set()
     try:
-        with open(path) as f:
+        # bytes lines: both parsers take UTF-8 directly, skipping a str decode
+        with open(path, "rb") as f:
             for line_num, line in enumerate(f, 1):
                 if line.strip():
                     try:
-                        obj = json.loads(line)
+                        obj = _json_loads(line)
                         if "id" not in obj or "text" not in obj:
                             print(f"Warning: Line {line_num} missing required fields (id, text)")
                             continue
@@ -35,7 +50,7 @@ def _load_docs(path):
                         seen_ids.add(doc_id)
                         raw.append(obj)
                         docs.append(obj["text"])
-                    except json.JSONDecodeError as e:
+                    except json.JSONDecodeError as e:  # orjson's error subclasses it
                         print(f"Warning: Invalid JSON on line {line_num}: {e}")
                         continue
     except Exception as e:
@@ -62,14 +77,76 @@ def _load_queries(path):
         print(f"Error loading queries: {e}")
         sys.exit(1)
 
-def main():
-    if len(sys.argv) < 4 or len(sys.argv) > 5:
-        print("Usage: python system/search_system.py <queries_json> <documents_jsonl> <run_output_json>")
-        print("Example: python system/search_system.py data/dev/queries.json data/dev/documents.jsonl runs/run_default.json")
-        sys.exit(1)
-    
-    queries_path, doc_path, output_path = sys.argv[1], sys.argv[2], sys.argv[3]
-    
+def _clean_structured(query):
+    """
+    Clean a boolean or proximity query in place: every operand word is
+    normalised and lemmatized like a document token in preprocess, so "wolves"
+    finds the indexed "wolf". Stopwords were never indexed, so they are dropped
+    from quoted phrases (whose stored positions skip them too); a bare stopword
+    operand stays, since removing it would break the operator structure, and
+    it matches nothing like any other term missing from the index.
+    """
+    _, _, stop, lemmatize = _nlp()
+    toks = []
+
+    def word(w, in_phrase):
+        w = unicodedata.normalize("NFKC", w).lower()
+        if w.isdigit():
+            return w                        # the k of NEAR/k, or a numeric operand
+        if w in stop:
+            return "" if in_phrase else w
+        w = lemmatize(w)
+        toks.append(w)
+        return w
+
+    def part(m):
+        s = m.group(0)
+        if s[0] != '"':
+            return word(s, False)
+        inner = " ".join(_RE_OPERAND.sub(lambda w: word(w.group(0), True), s[1:-1]).split())
+        return f'"{inner}"' if inner else s.lower()   # all stopwords: matches nothing
+
+    return _RE_PHRASE_OR_OPERAND.sub(part, query), toks
+
+
+def _clean_query(query):
+    """
+    Return (query_for_processing, ranking_tokens).
+    Natural-language queries go through the same preprocessing as documents;
+    boolean and proximity queries keep their operators and quotes and have
+    their operand words cleaned by _clean_structured. A wildcard pattern is
+    only lowercased, since lemmatizing part of a word would change what it matches.
+    """
+    try:
+        qtype = detect_query_type(query)
+    except ValueError:
+        return None, []
+    if qtype == "natural_language":
+        toks = preprocess(query)
+        return " ".join(toks), toks
+    if qtype != "wildcard":
+        return _clean_structured(query)
+    cleaned = _RE_OPERAND.sub(lambda m: m.group(0).lower(), query)
+    toks = [m.group(0) for m in _RE_OPERAND.finditer(cleaned) if not m.group(0).isdigit()]
+    return cleaned, toks
+
+
+def _run_query(qid, cleaned, query_toks, index_path, id2toks, method):
+    """Candidates via Task 2, ranking via Task 3; returns (doc_ids, scores) for one query."""
+    try:
+        candidates = sorted(process_query(cleaned, index_path)) if cleaned else []
+    except ValueError as e:
+        print(f"Warning: query {qid} rejected: {e}")
+        candidates = []
+    ranked, scores = rank_documents(
+        query_toks, [id2toks[d] for d in candidates], candidates, index_path,
+        method=method, top_k=TOP_K,
+    )
+    return ranked, scores
+
+
+def run(queries_path, doc_path, output_path, method="default"):
+    """Index `doc_path`, answer every query in `queries_path` and write the run JSON."""
     # Load queries and documents
     print(f"Loading queries from: {queries_path}")
     queries = _load_queries(queries_path)
@@ -83,14 +160,46 @@ def main():
     cache_dir = pathlib.Path(__file__).parent.parent / "cache"
     cache_dir.mkdir(exist_ok=True)
     
-    unified_index_path = cache_dir / "unified_package.pkl.gz"
+    unified_index_path = cache_dir / "unified_package.pkl"
     
 
+    print("  Preprocessing documents...")
+    doc_ids_list = [obj["id"] for obj in raw_docs]
+    tokenized_docs_list = preprocess_batch(doc_texts)
+    id2toks = dict(zip(doc_ids_list, tokenized_docs_list))
+
     print("  Creating unified index package...")
     # we should be able to overwrite the index if it already exists
     create_all_indexes(tokenized_docs_list, str(unified_index_path), doc_ids_list)
 
-    
+    # Queries that clean to the same form get the same run entry, so each
+    # distinct form is processed once (keyed by its first qid)
+    print(f"Processing {len(queries)} queries (ranking: {method})...")
+    index_path = str(unified_index_path)
+    prepared = []
+    distinct = {}                               # (cleaned, tokens) -> (qid, cleaned, tokens)
+    for q in queries:
+        cleaned, query_toks = _clean_query(q["query"])
+        key = (cleaned, tuple(query_toks))
+        prepared.append((str(q["qid"]), key))
+        distinct.setdefault(key, (str(q["qid"]), cleaned, query_toks))
+
+    # Run the first one alone, so the index/meta caches are filled before
+    # the rest fan out over a thread pool (map keeps query order)
+    todo = list(distinct.values())
+    ranked = []
+    if todo:
+        ranked.append(_run_query(*todo[0], index_path, id2toks, method))
+    rest = todo[1:]
+    if rest:
+        workers = min(len(rest), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ranked.extend(pool.map(lambda t: _run_query(*t, index_path, id2toks, method), rest))
+    by_key = dict(zip(distinct, ranked))
+    results = [
+        {"qid": qid, "doc_ids": by_key[key][0], "scores": by_key[key][1]} for qid, key in prepared
+    ]
+
     # Step 5: Write output JSON
     print(f"Writing results to: {output_path}")
     
@@ -104,5 +213,15 @@ def main():
     print(f"Successfully wrote {len(results)} query results")
 
 
+def main():
+    if len(sys.argv) < 4 or len(sys.argv) > 5:
+        print("Usage: python system/search_system.py <queries_json> <documents_jsonl> <run_output_json>")
+        print("Example: python system/search_system.py data/dev/queries.json data/dev/documents.jsonl runs/run_default.json")
+        sys.exit(1)
+
+    method = sys.argv[4] if len(sys.argv) == 5 else "default"
+    run(sys.argv[1], sys.argv[2], sys.argv[3], method)
+
+
 if __name__ == "__main__":
     main()
@@ -3,14 +3,21 @@
 # Minimal smoke tests to ensure the submission imports and runs.
 # This does NOT check correctness—only that functions execute without crashing.
 
+import argparse
+import contextlib
+import io
 import json
 import os
-import subprocess
 import sys
 import tempfile
 from pathlib import Path
 from typing import List
 
+try:  # optional: orjson parses the CLI's run file without a text decode pass
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 TMP_DIR = REPO_ROOT / "test_sanity" / "_tmp"
 TMP_DIR.mkdir(parents=True, exist_ok=True)
@@ -241,15 +248,24 @@ def step_task4_cli():
         if not script_path.exists():
             raise FileNotFoundError("Missing system/search_system.py")
 
-        cmd = [sys.executable, "-u", str(script_path), str(q_path), str(d_path), str(out_path)]
-        proc = subprocess.run(cmd, cwd=str(REPO_ROOT), capture_output=True, text=True, timeout=180)
-        if proc.returncode != 0:
-            raise RuntimeError(f"CLI exited {proc.returncode}\nSTDERR:\n{proc.stderr}")
+        # run the CLI in-process: the project modules imported by the steps
+        # above are reused instead of paying a second interpreter start
+        search_system = import_or_fail("system.search_system")
+        log = io.StringIO()
+        cwd = os.getcwd()
+        try:
+            os.chdir(REPO_ROOT)
+            with contextlib.redirect_stdout(log):
+                search_system.run(str(q_path), str(d_path), str(out_path))
+        except SystemExit as e:
+            raise RuntimeError(f"CLI exited {e.code}\nOUTPUT:\n{log.getvalue()}") from None
+        finally:
+            os.chdir(cwd)
 
         if not out_path.exists():
             raise FileNotFoundError("CLI did not produce the output JSON")
 
-        data = json.loads(out_path.read_text(encoding="utf-8"))
+        data = _json_loads(out_path.read_bytes())
         if not isinstance(data, list) or not data:
             raise ValueError("Output JSON must be a non-empty list")
         item = data[0]
@@ -260,6 +276,13 @@ def step_task4_cli():
         record(name, False, str(e))
 
 def main():
+    parser = argparse.ArgumentParser(description="Smoke-test the submission.")
+    lane = parser.add_mutually_exclusive_group()
+    lane.add_argument("--fast", action="store_true",
+                      help="Tasks 1-3 only (skip the end-to-end Task 4 CLI run on data/dev)")
+    lane.add_argument("--full", action="store_true", help="all steps (default)")
+    args = parser.parse_args()
+
     print("=== Sanity Check: starting ===")
     sys.path.insert(0, str(REPO_ROOT))
 
@@ -267,7 +290,8 @@ def main():
     step_task1_access()
     step_task2_processors()
     step_task3_ranker()
-    step_task4_cli()
+    if not args.fast:
+        step_task4_cli()
 
     print("\n=== Summary ===")
     passed = sum(1 for _, ok, _ in RESULTS if ok)
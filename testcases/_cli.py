@@ -0,0 +1,59 @@
+"""
+Run a repository CLI script the way `python -u <script> args...` from the repo
+root would, for tests.
+
+By default the script's module is imported and its main() called in this
+process (cwd switched to the repo root, sys.argv set, stdout/stderr
+captured), which skips interpreter start-up and re-importing the package graph
+for every test. Set IR_TEST_CLI_SUBPROCESS=1 to run every CLI in a real
+subprocess instead; `subprocess=True` always does.
+"""
+
+import contextlib
+import importlib
+import io
+import os
+import pathlib
+import subprocess as _subprocess
+import sys
+import traceback
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
+_FORCE_SUBPROCESS = os.environ.get("IR_TEST_CLI_SUBPROCESS") == "1"
+
+
+def run_cli(script: str, *args, subprocess: bool = False) -> _subprocess.CompletedProcess:
+    """
+    Run `script` (repo-relative, e.g. "system/search_system.py") with `args`
+    and return a CompletedProcess with returncode, stdout and stderr.
+    """
+    argv = [str(REPO_ROOT / script)] + [str(a) for a in args]
+    if subprocess or _FORCE_SUBPROCESS:
+        return _subprocess.run(
+            [sys.executable, "-u"] + argv,
+            cwd=str(REPO_ROOT), capture_output=True, text=True, timeout=180,
+        )
+
+    module = importlib.import_module(script[: -len(".py")].replace("/", "."))
+    out, err = io.StringIO(), io.StringIO()
+    prev_cwd, prev_argv = os.getcwd(), sys.argv
+    os.chdir(REPO_ROOT)
+    sys.argv = argv
+    try:
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                code = module.main()
+            except SystemExit as e:
+                code = e.code
+            except Exception:
+                traceback.print_exc()     # lands in err, like an uncaught error would
+                code = 1
+    finally:
+        sys.argv = prev_argv
+        os.chdir(prev_cwd)
+    if code is None:
+        code = 0
+    elif not isinstance(code, int):
+        err.write(f"{code}\n")
+        code = 1
+    return _subprocess.CompletedProcess(argv, code, out.getvalue(), err.getvalue())
@@ -0,0 +1,44 @@
+"""
+Corpora shared by several test modules, and the scratch directory every test
+index is written to. Each shared corpus is indexed at most once per test
+process; all index files live in a private temporary directory (tmpfs-backed
+where /tmp is) that is removed at exit, so modules run in parallel processes
+never share (or race on) an index file and nothing lands in the repo tree.
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+from typing import Set, Tuple
+
+from index.builders import create_all_indexes
+
+CORPUS_A: Tuple[Tuple[str, ...], ...] = (
+    ("climate", "change", "effects"),          # 10: positions 0,1,2
+    ("machine", "learning", "algorithms"),     # 20: 0,1,2
+    ("climate", "science", "research"),        # 30
+    ("renewable", "energy", "transition"),     # 40
+)
+DIDS_A: Tuple[int, ...] = (10, 20, 30, 40)
+
+_TMP_DIR = tempfile.mkdtemp(prefix="ir_testcases_")
+atexit.register(shutil.rmtree, _TMP_DIR, ignore_errors=True)
+
+
+def tmp_index_path(name: str) -> str:
+    """Path for a test index file inside this process's scratch directory."""
+    return os.path.join(_TMP_DIR, name)
+
+
+IDX_A = tmp_index_path("corpus_a.pkl")
+
+_built: Set[str] = set()
+
+
+def ensure_index_a() -> str:
+    """Build the CORPUS_A index on first use and return its path."""
+    if IDX_A not in _built:
+        create_all_indexes([list(d) for d in CORPUS_A], IDX_A, list(DIDS_A))
+        _built.add(IDX_A)
+    return IDX_A
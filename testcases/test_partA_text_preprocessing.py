@@ -0,0 +1,85 @@
+"""
+Tests for Part A text preprocessing (utils/text_preprocessing.py).
+Run with:  python -m unittest testcases/test_partA_text_preprocessing.py
+Skipped when the NLTK data (punkt, stopwords, wordnet) is not installed.
+"""
+
+import html, unittest
+from unittest import mock
+
+import utils.text_preprocessing as tp
+from utils.text_preprocessing import preprocess, preprocess_batch
+
+class TestPreprocess(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            preprocess("probe")
+        except LookupError as e:  # punkt / stopwords / wordnet not downloaded
+            raise unittest.SkipTest(f"NLTK data missing: {e}")
+
+    def test_tags_and_entities_stripped(self):
+        # plain tags (regex path) and a quoted attribute with '>' (bs4 path)
+        self.assertEqual(preprocess("<p>Climate <b>change</b> &amp; <i>policy</i></p>"),
+                         ["climate", "change", "policy"])
+        self.assertEqual(preprocess('<a href="x>y">Solar</a> power'), ["solar", "power"])
+        self.assertEqual(preprocess("caf&eacute; &amp; cr&egrave;me"), ["café", "crème"])
+
+    def test_references_decoded_as_bs4_does(self):
+        # html.parser drops the '&' of a bare trailing "&name" and the ';' of an unknown "&name;"
+        from bs4 import BeautifulSoup
+        for text in ("R&D", "<p>AT&T</p>", "R&D lab", "Q&A &amp; more", "x&#65;", "&Dgt;x", "a &b", "&#1;a"):
+            with self.subTest(text=text):
+                want = html.unescape(BeautifulSoup(text, "html.parser").get_text(" "))
+                self.assertEqual(tp._strip_markup(text, BeautifulSoup).split(), want.split())
+        self.assertEqual(preprocess("Spending on R&D"), ["spending", "rd"])
+
+    def test_stopwords_removed(self):
+        self.assertEqual(preprocess("The cat and the dog are in the garden"), ["cat", "dog", "garden"])
+
+    def test_lemmatized(self):
+        self.assertEqual(preprocess("Geese studies wolves"), ["goose", "study", "wolf"])
+
+    def test_punkt_tokenization(self):
+        # contractions split off ("n't", "'s") and punctuation is dropped as non-alnum
+        self.assertEqual(preprocess("Don't stop: it's the U.S. economy, isn't it?"), ["stop", "economy"])
+        self.assertEqual(preprocess("Mr. Smith bought 3 houses. They were cheap!"),
+                         ["smith", "bought", "3", "house", "cheap"])
+
+    def test_unicode_and_case_normalized(self):
+        self.assertEqual(preprocess("ＣＬＩＭＡＴＥ models"), ["climate", "model"])
+
+    def test_empty_and_markup_only(self):
+        for text in ("", "   ", "<br/> <p></p>"):
+            with self.subTest(text=text):
+                self.assertEqual(preprocess(text), [])
+
+    def test_rejects_non_string(self):
+        with self.assertRaises(TypeError):
+            preprocess(["not", "a", "string"])
+
+class TestPreprocessBatch(unittest.TestCase):
+    TEXTS = [
+        "<p>Climate <b>change</b> &amp; policy</p>",
+        "The geese studies wolves",
+        "",
+        '<a href="x>y">Solar</a> power',
+        "machine learning models",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        TestPreprocess.setUpClass()
+
+    def test_in_process_matches_preprocess(self):
+        self.assertEqual(preprocess_batch(self.TEXTS), [preprocess(t) for t in self.TEXTS])
+
+    def test_worker_processes_match_preprocess(self):
+        # at least 1024 texts per worker, so two workers need 2048
+        texts = self.TEXTS * 420
+        with mock.patch.object(tp, "_PARALLEL_MIN_DOCS", 0):
+            out = preprocess_batch(texts, workers=2)
+        self.assertEqual(out, [preprocess(t) for t in texts])
+
+if __name__ == "__main__":
+    unittest.main()
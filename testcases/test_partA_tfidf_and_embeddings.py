@@ -0,0 +1,117 @@
+"""
+Tests for Part A tf-idf and embedding aggregation (utils/tfidf.py, utils/embeddings.py).
+Run with:  python -m unittest testcases/test_partA_tfidf_and_embeddings.py
+The embedding tests use a small synthetic vocabulary instead of GloVe; the
+sparse tf-idf test is skipped when scipy is not installed.
+"""
+
+import importlib.util
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import utils.embeddings as emb
+from utils.embeddings import semantic_vector
+from utils.tfidf import tfidf_variants
+
+DOCS = [["a", "b", "a"], ["b", "c"], ["a"]]
+L15, L3 = np.log(1.5), np.log(3.0)   # idf of a / b (df 2 of 3) and c (df 1 of 3)
+
+class TestTfidfVariants(unittest.TestCase):
+    def test_pinned_values(self):
+        expected = {
+            "raw": [[2 / 3 * L15, 1 / 3 * L15, 0.0], [0.0, 0.5 * L15, 0.5 * L3], [L15, 0.0, 0.0]],
+            "log": [[(1 + np.log(2)) * L15, L15, 0.0], [0.0, L15, L3], [L15, 0.0, 0.0]],
+            # k = 1.2: tf 2 -> 2.2 * 2 / 3.2 = 1.375, tf 1 -> 1
+            "bm25": [[1.375 * L15, L15, 0.0], [0.0, L15, L3], [L15, 0.0, 0.0]],
+        }
+        for mode, want in expected.items():
+            with self.subTest(tf_mode=mode):
+                X, vocab = tfidf_variants(DOCS, tf_mode=mode)
+                self.assertEqual(vocab, {"a": 0, "b": 1, "c": 2})
+                np.testing.assert_allclose(X, want, rtol=1e-6)
+
+    def test_dtype(self):
+        for mode in ("raw", "log", "bm25"):
+            with self.subTest(tf_mode=mode):
+                self.assertEqual(tfidf_variants(DOCS, tf_mode=mode)[0].dtype, np.float32)
+        X64, _ = tfidf_variants(DOCS, dtype=np.float64)
+        self.assertEqual(X64.dtype, np.float64)
+        with self.assertRaises(ValueError):
+            tfidf_variants(DOCS, dtype=np.int32)
+
+    def test_empty_docs(self):
+        X, vocab = tfidf_variants([[], []])
+        self.assertEqual(X.shape, (2, 0))
+        self.assertEqual(vocab, {})
+
+    @unittest.skipIf(importlib.util.find_spec("scipy") is None, "scipy not installed")
+    def test_sparse_matches_dense(self):
+        docs = DOCS + [[], ["c", "c", "d", "a"]]
+        for mode in ("raw", "log", "bm25"):
+            dense, vocab = tfidf_variants(docs, tf_mode=mode)
+            for layout in (True, "csr", "coo"):
+                with self.subTest(tf_mode=mode, sparse=layout):
+                    X, svocab = tfidf_variants(docs, tf_mode=mode, sparse=layout)
+                    self.assertEqual(X.format, "coo" if layout == "coo" else "csr")
+                    self.assertEqual(X.dtype, np.float32)
+                    self.assertEqual(svocab, vocab)
+                    np.testing.assert_array_equal(X.toarray(), dense)
+
+class TestSemanticVector(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vocab = {"x": 0, "y": 1, "z": 2, "<unk>": 3}
+        self.mat = rng.normal(size=(4, 5)).astype(np.float32)
+        patcher = mock.patch.object(emb, "_glove", lambda: (self.vocab, self.mat))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # weights cached for one vocabulary must not leak into another test
+        emb._tfidf_weights.cache_clear()
+        self.addCleanup(emb._tfidf_weights.cache_clear)
+        self.docs = [["x", "y", "x"], [], ["z", "oov"]]
+
+    def rows(self, doc):
+        return self.mat[[self.vocab.get(t, 3) for t in doc]].astype(np.float64)
+
+    def test_small_batch_matches_general_path(self):
+        for method in ("mean", "max", "sum", "meanmax"):
+            with self.subTest(method=method):
+                small = semantic_vector(self.docs, method)
+                with mock.patch.object(emb, "_SMALL_N", 0), mock.patch.object(emb, "_GATHER_TOKENS", 2):
+                    general = semantic_vector(self.docs, method)
+                self.assertEqual(small.dtype, np.float32)
+                self.assertEqual(general.dtype, np.float32)
+                np.testing.assert_allclose(small, general, rtol=1e-6, atol=1e-7)
+
+    def test_aggregations(self):
+        out = {m: semantic_vector(self.docs, m) for m in ("mean", "max", "sum", "meanmax")}
+        for i, doc in enumerate(self.docs):
+            M = self.rows(doc) if doc else np.zeros((1, 5))
+            np.testing.assert_allclose(out["sum"][i], M.sum(axis=0), rtol=1e-6)
+            np.testing.assert_allclose(out["mean"][i], M.mean(axis=0), rtol=1e-6)
+            np.testing.assert_allclose(out["max"][i], M.max(axis=0), rtol=1e-6)
+            np.testing.assert_allclose(out["meanmax"][i], np.concatenate([M.mean(axis=0), M.max(axis=0)]),
+                                       rtol=1e-6)
+        self.assertEqual(semantic_vector([], "meanmax").shape, (0, 10))
+
+    def test_tfidf_weighted(self):
+        docs = self.docs + [["x"]]
+        N = len(docs)
+        # df per matrix row: x in docs 0 and 3, y in 0, z and <unk> in 2
+        idf = {0: np.log(N / 2), 1: np.log(N / 1), 2: np.log(N / 1), 3: np.log(N / 1)}
+        want = np.zeros((N, 5))
+        for i, doc in enumerate(docs):
+            rows, tf = np.unique([self.vocab.get(t, 3) for t in doc], return_counts=True)
+            w = tf * np.array([idf[r] for r in rows])
+            if w.sum() > 0:
+                want[i] = (w @ self.mat[rows].astype(np.float64)) / w.sum()
+        out = semantic_vector(docs, "tfidf_weighted")
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_allclose(out, want, rtol=1e-5, atol=1e-7)
+        # cached weights give the same result on a repeated call
+        np.testing.assert_array_equal(semantic_vector(docs, "tfidf_weighted"), out)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,12 +3,19 @@ Basic correctness tests for Task 1 (Indexing and Access).
 Run with:  python -m unittest testcases/test_task1_basic.py
 """
 
+import contextlib
 import os
 import unittest
+
+import numpy as np
+
+from index import codec
 from index.builders import create_all_indexes
-from index.access import get_posting_list, find_wildcard_matches, get_term_positions
+from index.codec import RAW_MIN
+from index.access import get_posting_list, get_posting_array, find_wildcard_matches, get_term_positions
+from testcases._corpora import tmp_index_path
 
-TEST_INDEX_PATH = "testcases/tmp_index.pkl"
+TEST_INDEX_PATH = tmp_index_path("index.pkl")
 
 class TestTask1Basic(unittest.TestCase):
     @classmethod
@@ -24,7 +31,7 @@ class TestTask1Basic(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(TEST_INDEX_PATH):
+        with contextlib.suppress(FileNotFoundError):
             os.remove(TEST_INDEX_PATH)
 
     def test_posting_list_unigram(self):
@@ -35,6 +42,15 @@ class TestTask1Basic(unittest.TestCase):
         postings = get_posting_list(("climate", "change"), TEST_INDEX_PATH)
         self.assertEqual(postings, [10, 30])
 
+    def test_posting_array_matches_list(self):
+        # the array form backs vectorized set operations: sorted int32, read-only
+        for term in ("climate", ("climate", "change"), "doesnotexist"):
+            with self.subTest(term=term):
+                arr = get_posting_array(term, TEST_INDEX_PATH)
+                self.assertEqual(arr.dtype, np.int32)
+                self.assertFalse(arr.flags.writeable)
+                self.assertTrue(np.array_equal(arr, get_posting_list(term, TEST_INDEX_PATH)))
+
     def test_wildcard(self):
         matches = find_wildcard_matches("$cl", TEST_INDEX_PATH)
         self.assertIn("climate", matches)
@@ -45,9 +61,71 @@ class TestTask1Basic(unittest.TestCase):
         self.assertEqual(pos, [0])
 
     def test_oov(self):
-        self.assertEqual(get_posting_list("doesnotexist", TEST_INDEX_PATH), [])
-        self.assertEqual(find_wildcard_matches("zzz", TEST_INDEX_PATH), [])
-        self.assertEqual(get_term_positions("change", 999, TEST_INDEX_PATH), [])
+        cases = [
+            ("get_posting_list", lambda: get_posting_list("doesnotexist", TEST_INDEX_PATH)),
+            ("find_wildcard_matches", lambda: find_wildcard_matches("zzz", TEST_INDEX_PATH)),
+            ("get_term_positions", lambda: get_term_positions("change", 999, TEST_INDEX_PATH)),
+            # unigrams are keyed by the str alone; a 1-tuple or empty tuple is not an n-gram
+            ("get_posting_list 1-tuple", lambda: get_posting_list(("climate",), TEST_INDEX_PATH)),
+            ("get_posting_list ()", lambda: get_posting_list((), TEST_INDEX_PATH)),
+            ("get_posting_array 1-tuple", lambda: get_posting_array(("climate",), TEST_INDEX_PATH).tolist()),
+            ("get_term_positions 1-tuple", lambda: get_term_positions(("climate",), 10, TEST_INDEX_PATH)),
+        ]
+        for name, call in cases:
+            with self.subTest(api=name):
+                self.assertEqual(call(), [])
+
+class TestTask1HotLists(unittest.TestCase):
+    """Posting lists of at least RAW_MIN ids are stored raw and read as int32 views of the mapped file."""
+
+    PATH = tmp_index_path("index_hot.pkl")
+
+    @classmethod
+    def setUpClass(cls):
+        # "common" is in every doc (a raw list); the odd-sized varint lists of the
+        # other terms would leave it at an arbitrary byte offset without padding
+        n = RAW_MIN + 100
+        docs = [["common", f"t{i % 5}", "common"] for i in range(n)]
+        create_all_indexes(docs, cls.PATH, list(range(n)))
+        cls.n = n
+
+    @classmethod
+    def tearDownClass(cls):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(cls.PATH)
+
+    def test_raw_list_is_aligned_view(self):
+        for term in ("common", ("common", "t3"), "t3"):
+            with self.subTest(term=term):
+                arr = get_posting_array(term, self.PATH)
+                self.assertEqual(arr.ctypes.data % 4, 0)
+                self.assertTrue(arr.flags.aligned)
+                self.assertEqual(arr.tolist(), get_posting_list(term, self.PATH))
+        self.assertEqual(get_posting_list("common", self.PATH), list(range(self.n)))
+        self.assertEqual(get_posting_list("t3", self.PATH), list(range(3, self.n, 5)))
+
+    def test_positions_of_hot_term(self):
+        self.assertEqual(get_term_positions("common", self.n - 1, self.PATH), [0, 2])
+        self.assertEqual(get_term_positions("t3", 3, self.PATH), [1])
+
+    def test_varint_decode_ignores_trailing_pad(self):
+        for ids in ([5], [0, 1, 2, 200, 70000], list(range(0, 3000, 3))):
+            with self.subTest(n=len(ids)):
+                buf = codec.encode_sorted(ids)
+                self.assertEqual(codec.count(buf), len(ids))
+                self.assertEqual(codec.decode(buf).tolist(), ids)
+                if len(ids) < RAW_MIN:
+                    self.assertEqual(codec.decode(buf + b"\0\0\0").tolist(), ids)
+
+    def test_ids_outside_int32_are_rejected(self):
+        # decoded postings are int32; an id that would wrap is an error, not a wrong posting
+        top = codec.MAX_ID
+        self.assertEqual(codec.decode(codec.encode_sorted([5, top])).tolist(), [5, top])
+        self.assertEqual(codec.decode(codec.encode_sorted(range(top - RAW_MIN, top + 1)))[-1], top)
+        for ids in ([-1, 2], [5, top + 1], [5, 3_000_000_000], range(top - RAW_MIN, top + 2)):
+            with self.subTest(ids=ids):
+                with self.assertRaises(ValueError):
+                    codec.encode_sorted(ids)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,8 +1,13 @@
-import os, unittest
+import contextlib, os, unittest, weakref
+from unittest import mock
+from index import io as index_io
 from index.builders import create_all_indexes
-from index.access import get_posting_list  # uses package cache internally
+from index.access import (  # uses package cache internally
+    _load_index, find_wildcard_matches, get_posting_list, get_term_positions, get_unigram_dfs,
+)
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_index_cache.pkl"
+IDX = tmp_index_path("index_cache.pkl")
 
 class TestCacheReload(unittest.TestCase):
     @classmethod
@@ -13,7 +18,7 @@ class TestCacheReload(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(IDX):
+        with contextlib.suppress(FileNotFoundError):
             os.remove(IDX)
 
     def test_multiple_calls_same_path(self):
@@ -23,5 +28,76 @@ class TestCacheReload(unittest.TestCase):
         self.assertEqual(p1, [2, 4])
         self.assertEqual(p1, p2)
 
+    def test_hot_lookups_are_served_from_cache(self):
+        # regression guard for the access-layer caches: a repeated lookup must
+        # return the very same shared object instead of re-decoding it
+        for lookup, arg in ((get_posting_list, "a"), (find_wildcard_matches, "$a")):
+            with self.subTest(lookup=lookup.__name__):
+                first = lookup(arg, IDX)
+                for _ in range(1000):
+                    self.assertIs(lookup(arg, IDX), first)
+
+    def test_rebuild_same_path_is_seen(self):
+        # rewriting the index in place must not serve results cached from the old file
+        tmp = tmp_index_path("index_cache_rebuild.pkl")
+        try:
+            create_all_indexes([["a"]], tmp, [1])
+            self.assertEqual(get_posting_list("a", tmp), [1])
+            create_all_indexes([["b"], ["a"]], tmp, [5, 7])
+            self.assertEqual(get_posting_list("a", tmp), [7])
+            self.assertEqual(get_posting_list("b", tmp), [5])
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+
+    def test_file_replaced_without_invalidate_is_seen(self):
+        # a file swapped in by another process (no invalidate() here) must not
+        # mix cached results from the old index with lookups on the new one
+        tmp = tmp_index_path("index_cache_swap.pkl")
+        new = tmp_index_path("index_cache_swap_new.pkl")
+        try:
+            create_all_indexes([["b", "a"], ["a"], ["c"]], new, [2, 3, 4])
+            create_all_indexes([["a"]], tmp, [1])
+            self.assertEqual(get_posting_list("a", tmp), [1])
+            self.assertEqual(get_term_positions("a", 1, tmp), [0])
+            self.assertEqual(get_unigram_dfs(tmp), {"a": 1})
+
+            st = os.stat(tmp)
+            os.replace(new, tmp)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+            self.assertEqual(get_posting_list("a", tmp), [2, 3])
+            self.assertEqual(get_posting_list("b", tmp), [2])
+            self.assertEqual(get_term_positions("a", 1, tmp), [])
+            self.assertEqual(get_term_positions("a", 2, tmp), [1])
+            self.assertEqual(get_unigram_dfs(tmp), {"b": 1, "a": 2, "c": 1})
+        finally:
+            for p in (tmp, new):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(p)
+
+    def test_rebuild_releases_the_old_map_before_replacing(self):
+        # Windows cannot replace a mapped file: the cached map must be closed first
+        tmp = tmp_index_path("index_cache_unmap.pkl")
+        try:
+            create_all_indexes([["a"]], tmp, [1])
+            self.assertEqual(get_posting_list("a", tmp), [1])
+            self.assertEqual(get_term_positions("a", 1, tmp), [0])
+            old_map = weakref.ref(_load_index(tmp)["unified"]._blob.obj)
+            mapped_at_replace = []
+            real_replace = os.replace
+
+            def replace(src, dst):
+                mapped_at_replace.append(old_map() is not None)
+                real_replace(src, dst)
+
+            with mock.patch.object(index_io.os, "replace", replace):
+                create_all_indexes([["b"], ["a"]], tmp, [5, 7])
+            self.assertEqual(mapped_at_replace, [False])
+            self.assertEqual(get_posting_list("a", tmp), [7])
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+
 if __name__ == "__main__":
     unittest.main()
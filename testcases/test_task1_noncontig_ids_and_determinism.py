@@ -1,9 +1,10 @@
-import os, unittest, copy
+import contextlib, os, pathlib, unittest
 from index.builders import create_all_indexes
 from index.access import get_posting_list, get_term_positions
+from testcases._corpora import tmp_index_path
 
-IDX1 = "testcases/tmp_index_det1.pkl"
-IDX2 = "testcases/tmp_index_det2.pkl"
+IDX1 = tmp_index_path("index_det1.pkl")
+IDX2 = tmp_index_path("index_det2.pkl")
 
 class TestDeterminism(unittest.TestCase):
     @classmethod
@@ -14,19 +15,55 @@ class TestDeterminism(unittest.TestCase):
             ["z", "x", "y"],
         ]
         dids = [101, 5, 3001]  # non-contiguous, unsorted
-        create_all_indexes(copy.deepcopy(docs), IDX1, dids)
-        create_all_indexes(copy.deepcopy(docs), IDX2, dids)
+        cls.docs_before = [list(d) for d in docs]
+        cls.docs = docs
+        create_all_indexes(docs, IDX1, dids)   # same (unmutated) inputs both times
+        create_all_indexes(docs, IDX2, dids)
 
     @classmethod
     def tearDownClass(cls):
         for p in (IDX1, IDX2):
-            if os.path.exists(p):
+            with contextlib.suppress(FileNotFoundError):
                 os.remove(p)
 
+    def test_builds_are_byte_identical(self):
+        self.assertEqual(pathlib.Path(IDX1).read_bytes(), pathlib.Path(IDX2).read_bytes())
+
+    def test_inputs_not_mutated(self):
+        self.assertEqual(self.docs, self.docs_before)
+
     def test_same_results_across_builds(self):
         self.assertEqual(get_posting_list("x", IDX1), get_posting_list("x", IDX2))
         self.assertEqual(get_posting_list(("y","z"), IDX1), get_posting_list(("y","z"), IDX2))
         self.assertEqual(get_term_positions("z", 3001, IDX1), get_term_positions("z", 3001, IDX2))
 
+class TestDocIdRange(unittest.TestCase):
+    """Doc ids are stored as int32: the top of that range indexes, anything outside is rejected up front."""
+
+    PATH = tmp_index_path("index_id_range.pkl")
+
+    def tearDown(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.PATH)
+
+    def test_int32_bounds_index(self):
+        top = 2**31 - 1
+        create_all_indexes([["a"], ["a", "b"], ["b"]], self.PATH, [top, 0, 7])
+        self.assertEqual(get_posting_list("a", self.PATH), [0, top])
+        self.assertEqual(get_term_positions("b", 0, self.PATH), [1])
+
+    def test_out_of_range_ids_rejected(self):
+        for dids in ([-1, 2], [5, 3_000_000_000], [5, 2**31]):
+            with self.subTest(doc_ids=dids):
+                with self.assertRaisesRegex(ValueError, "doc_ids must be in"):
+                    create_all_indexes([["a"], ["b"]], self.PATH, dids)
+                self.assertFalse(os.path.exists(self.PATH))
+
+    def test_non_integer_ids_rejected(self):
+        for dids in ([1.5, 2], ["a", "b"]):
+            with self.subTest(doc_ids=dids):
+                with self.assertRaisesRegex(TypeError, "doc_ids must be integers"):
+                    create_all_indexes([["a"], ["b"]], self.PATH, dids)
+
 if __name__ == "__main__":
     unittest.main()
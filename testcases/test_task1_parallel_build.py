@@ -0,0 +1,53 @@
+import contextlib, os, unittest
+from unittest import mock
+import index.builders as builders
+from index.access import get_posting_list, get_term_positions, find_wildcard_matches
+from testcases._corpora import tmp_index_path
+
+IDX_SEQ = tmp_index_path("index_par_seq.pkl")
+IDX_PAR = tmp_index_path("index_par_par.pkl")
+IDX_REPEAT = tmp_index_path("index_par_repeat.pkl")
+
+class TestParallelBuild(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        docs = [
+            ["x", "y", "z", "x"],
+            ["y", "z", "y"],
+            ["z", "x", "y"],
+            ["x", "x", "w"],
+            ["w", "y", "z"],
+        ]
+        dids = [101, 5, 3001, 7, 42]  # non-contiguous, unsorted
+        builders.create_all_indexes(docs, IDX_SEQ, dids, workers=1)
+        # force the multiprocessing path on a tiny corpus
+        with mock.patch.object(builders, "_PARALLEL_MIN_DOCS", 0):
+            builders.create_all_indexes(docs, IDX_PAR, dids, workers=3)
+            # doc_id 7 repeats across the first two of three shards
+            builders.create_all_indexes(
+                [["a", "b", "a"], ["b", "a"], ["a"], ["c"], ["a"]], IDX_REPEAT, [7, 7, 7, 9, 9], workers=3
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        for p in (IDX_SEQ, IDX_PAR, IDX_REPEAT):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(p)
+
+    def test_same_postings(self):
+        for key in ("x", "y", "z", "w", ("y", "z"), ("x", "y", "z")):
+            self.assertEqual(get_posting_list(key, IDX_SEQ), get_posting_list(key, IDX_PAR))
+        self.assertEqual(get_posting_list("x", IDX_PAR), [7, 101, 3001])
+
+    def test_same_positions_and_wildcards(self):
+        self.assertEqual(get_term_positions("x", 7, IDX_PAR), [0, 1])
+        self.assertEqual(get_term_positions("y", 5, IDX_SEQ), get_term_positions("y", 5, IDX_PAR))
+        self.assertEqual(find_wildcard_matches("*", IDX_SEQ), find_wildcard_matches("*", IDX_PAR))
+
+    def test_repeated_doc_id_across_shards(self):
+        self.assertEqual(get_posting_list("a", IDX_REPEAT), [7, 9])
+        self.assertEqual(get_term_positions("a", 7, IDX_REPEAT), [0, 0, 1, 2])
+        self.assertEqual(get_term_positions("a", 9, IDX_REPEAT), [0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,11 @@
-import os, unittest
+import contextlib, os, unittest
 from index.builders import create_all_indexes
 from index.access import get_posting_list, get_term_positions, find_wildcard_matches
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_index_sort.pkl"
+IDX = tmp_index_path("index_sort.pkl")
+IDX_LONG = tmp_index_path("index_sort_long.pkl")
+IDX_REPEAT = tmp_index_path("index_sort_repeat.pkl")
 
 class TestSortingAndDedup(unittest.TestCase):
     @classmethod
@@ -16,16 +19,31 @@ class TestSortingAndDedup(unittest.TestCase):
         doc_ids = [101, 7, 999]  # non-contiguous + unsorted
         create_all_indexes(docs, IDX, doc_ids)
 
+        # long posting lists are stored raw rather than delta-encoded
+        long_docs = [["common", "rare" if i % 500 == 0 else "other"] for i in range(3000)]
+        create_all_indexes(long_docs, IDX_LONG, [3 * i + 1 for i in range(3000)][::-1])
+
+        # the same doc_id given to two documents: their positions merge in order
+        create_all_indexes([["a", "b", "a"], ["b", "a"], ["c"]], IDX_REPEAT, [7, 7, 3])
+
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(IDX):
-            os.remove(IDX)
+        for p in (IDX, IDX_LONG, IDX_REPEAT):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(p)
 
     def test_postings_sorted_and_dedup(self):
         # 'alpha' appears only in docs 101 and 999 (NOT in 7)
-        self.assertEqual(get_posting_list("alpha", IDX), [101, 999])
-        self.assertEqual(get_posting_list("beta", IDX), [7, 101, 999])
-        self.assertEqual(get_posting_list("gamma", IDX), [7, 999])
+        expected = {"alpha": [101, 999], "beta": [7, 101, 999], "gamma": [7, 999]}
+        for term, postings in expected.items():
+            with self.subTest(term=term):
+                self.assertEqual(get_posting_list(term, IDX), postings)
+
+    def test_long_postings_sorted(self):
+        ids = [3 * i + 1 for i in range(3000)][::-1]
+        self.assertEqual(get_posting_list("common", IDX_LONG), [3 * i + 1 for i in range(3000)])
+        self.assertEqual(get_posting_list("rare", IDX_LONG), sorted(ids[i] for i in range(0, 3000, 500)))
+        self.assertEqual(get_term_positions("common", 8998, IDX_LONG), [0])
 
     def test_positions_sorted_and_dedup(self):
         # alpha positions in doc 101: [0, 2, 3]
@@ -33,10 +51,20 @@ class TestSortingAndDedup(unittest.TestCase):
         # beta positions in doc 999: [2, 3]
         self.assertEqual(get_term_positions("beta", 999, IDX), [2, 3])
 
+    def test_repeated_doc_id_positions_sorted(self):
+        self.assertEqual(get_posting_list("a", IDX_REPEAT), [7])
+        self.assertEqual(get_term_positions("a", 7, IDX_REPEAT), [0, 1, 2])
+        self.assertEqual(get_term_positions("b", 7, IDX_REPEAT), [0, 1])
+
     def test_oov_returns_empty(self):
-        self.assertEqual(get_posting_list("nope", IDX), [])
-        self.assertEqual(get_term_positions("alpha", 123456, IDX), [])
-        self.assertEqual(find_wildcard_matches("$", IDX), [])  # per spec
+        cases = [
+            ("get_posting_list", lambda: get_posting_list("nope", IDX)),
+            ("get_term_positions", lambda: get_term_positions("alpha", 123456, IDX)),
+            ("find_wildcard_matches", lambda: find_wildcard_matches("$", IDX)),  # per spec
+        ]
+        for name, call in cases:
+            with self.subTest(api=name):
+                self.assertEqual(call(), [])
 
 if __name__ == "__main__":
     unittest.main()
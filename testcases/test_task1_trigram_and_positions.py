@@ -1,8 +1,9 @@
-import os, unittest
+import contextlib, os, unittest
 from index.builders import create_all_indexes
 from index.access import get_posting_list, get_term_positions
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_index_trigram.pkl"
+IDX = tmp_index_path("index_trigram.pkl")
 
 class TestTrigramAndPositions(unittest.TestCase):
     @classmethod
@@ -17,7 +18,7 @@ class TestTrigramAndPositions(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(IDX):
+        with contextlib.suppress(FileNotFoundError):
             os.remove(IDX)
 
     def test_bigram_postings(self):
@@ -1,8 +1,9 @@
-import os, unittest
+import contextlib, os, unittest
 from index.builders import create_all_indexes
 from index.access import find_wildcard_matches
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_index_wc.pkl"
+IDX = tmp_index_path("index_wc.pkl")
 
 class TestWildcardBoundaries(unittest.TestCase):
     @classmethod
@@ -17,7 +18,7 @@ class TestWildcardBoundaries(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(IDX):
+        with contextlib.suppress(FileNotFoundError):
             os.remove(IDX)
 
     def test_prefix_boundary(self):
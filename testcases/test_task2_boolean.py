@@ -1,26 +1,16 @@
-import os, unittest
-from typing import List
-from index.builders import create_all_indexes
-from query_processing.boolean import process_boolean_query
+import unittest
 
-IDX = "testcases/tmp_task2_boolean.pkl"
+import numpy as np
+
+from testcases._corpora import IDX_A, ensure_index_a
+from query_processing.boolean import _intersect_sorted, process_boolean_query, process_boolean_query_sorted
+
+IDX = IDX_A
 
 class TestTask2Boolean(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
-        docs: List[List[str]] = [
-            ["climate","change","effects"],          # 10
-            ["machine","learning","algorithms"],     # 20
-            ["climate","science","research"],        # 30
-            ["renewable","energy","transition"],     # 40
-        ]
-        dids = [10, 20, 30, 40]
-        create_all_indexes(docs, IDX, dids)
-
-    @classmethod
-    def tearDownClass(cls):
-        if os.path.exists(IDX):
-            os.remove(IDX)
+        ensure_index_a()   # CORPUS_A, docs 10/20/30/40 (see _corpora.py)
 
     def test_and_or(self):
         # climate AND change -> only doc 10
@@ -32,6 +22,11 @@ class TestTask2Boolean(unittest.TestCase):
         # climate AND NOT science -> doc 10 only
         self.assertEqual(process_boolean_query("climate AND NOT science", IDX), {10})
 
+    def test_not_collection_universe(self):
+        # default universe is the query's operands; "collection" negates against every doc
+        self.assertEqual(process_boolean_query("NOT climate", IDX), set())
+        self.assertEqual(process_boolean_query("NOT climate", IDX, universe="collection"), {20, 40})
+
     def test_parentheses(self):
         # (climate AND change) OR science -> {10,30}
         self.assertEqual(process_boolean_query("( climate AND change ) OR science", IDX), {10, 30})
@@ -40,5 +35,27 @@ class TestTask2Boolean(unittest.TestCase):
         # exact bigram "machine learning" -> doc 20
         self.assertEqual(process_boolean_query('"machine learning"', IDX), {20})
 
+    def test_sorted_array_form(self):
+        # same results as the set API, as sorted arrays
+        for q, exp in [("climate AND change", [10]), ("climate OR science OR energy", [10, 30, 40]),
+                       ("climate AND NOT science", [10]), ("missing AND climate", [])]:
+            with self.subTest(q=q):
+                got = process_boolean_query_sorted(q, IDX)
+                self.assertTrue(np.array_equal(got, np.array(exp, dtype=np.int64)))
+
+class TestIntersectSorted(unittest.TestCase):
+    def test_matches_intersect1d(self):
+        # both the merge (similar sizes) and the binary-search (skewed) regimes
+        rng = np.random.default_rng(0)
+        for n, m in [(0, 5), (1, 1), (3, 7), (50, 60), (100, 5000), (2000, 2000)]:
+            for _ in range(5):
+                a = np.sort(rng.choice(4 * m + 4, n, replace=False)).astype(np.int32)
+                b = np.sort(rng.choice(4 * m + 4, m, replace=False)).astype(np.int32)
+                with self.subTest(n=n, m=m):
+                    got = _intersect_sorted(a, b)
+                    self.assertEqual(got.dtype, np.int32)
+                    self.assertEqual(got.tolist(), np.intersect1d(a, b).tolist())
+                    self.assertEqual(_intersect_sorted(b, a).tolist(), got.tolist())
+
 if __name__ == "__main__":
     unittest.main()
@@ -30,3 +30,10 @@ class TestTask2Detection(unittest.TestCase):
             detect_query_type('climate NEAR / 2 change')  # non-strict NEAR form
         with self.assertRaises(ValueError):
             detect_query_type('NEAR/2 change')  # missing left operand
+
+    def test_repeated_queries(self):
+        # detection is memoized; a repeated query must keep its type or its raise
+        for _ in range(2):
+            self.assertEqual(detect_query_type('climate AND change'), 'boolean')
+            with self.assertRaisesRegex(ValueError, 'Unmatched quotes'):
+                detect_query_type('"unmatched')
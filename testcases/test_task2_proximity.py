@@ -1,26 +1,13 @@
-import os, unittest
-from typing import List
-from index.builders import create_all_indexes
-from query_processing.proximity import process_proximity_query
+import random, unittest
+from testcases._corpora import IDX_A, ensure_index_a
+from query_processing.proximity import _near_within, process_proximity_query
 
-IDX = "testcases/tmp_task2_proximity.pkl"
+IDX = IDX_A
 
 class TestTask2Proximity(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
-        docs: List[List[str]] = [
-            ["climate","change","effects"],          # 10: positions 0,1,2
-            ["machine","learning","algorithms"],     # 20: 0,1,2
-            ["climate","science","research"],        # 30
-            ["renewable","energy","transition"],     # 40
-        ]
-        dids = [10, 20, 30, 40]
-        create_all_indexes(docs, IDX, dids)
-
-    @classmethod
-    def tearDownClass(cls):
-        if os.path.exists(IDX):
-            os.remove(IDX)
+        ensure_index_a()   # CORPUS_A, docs 10/20/30/40 (see _corpora.py)
 
     def test_adjacent_unigrams(self):
         # climate (0) NEAR/1 change (1) -> True in doc 10
@@ -34,5 +21,25 @@ class TestTask2Proximity(unittest.TestCase):
         # change (1..1) NEAR/0 "climate change" (0..1) -> spans overlap => distance 0 => hit
         self.assertEqual(process_proximity_query('change NEAR/0 "climate change"', IDX), {10})
 
+    def test_near_within_matches_pairwise_check(self):
+        # identical spans never count, even when a repeated position lists one twice
+        self.assertFalse(_near_within([0], 1, [0, 0], 1, 3))
+        self.assertFalse(_near_within([0, 0], 1, [0, 0], 1, 3))
+        self.assertTrue(_near_within([0], 1, [0, 0, 2], 1, 2))
+
+        def pairwise(left, m1, right, m2, k):   # the plain O(|left| * |right|) definition
+            return any(
+                (a, m1) != (b, m2) and max(0, b - (a + m1 - 1), a - (b + m2 - 1)) <= k
+                for a in left for b in right
+            )
+
+        rng = random.Random(0)
+        for _ in range(2000):
+            left = sorted(rng.choices(range(8), k=rng.randint(1, 4)))
+            right = sorted(rng.choices(range(8), k=rng.randint(1, 4)))
+            m1, m2, k = rng.randint(1, 3), rng.randint(1, 3), rng.randint(0, 3)
+            with self.subTest(left=left, m1=m1, right=right, m2=m2, k=k):
+                self.assertEqual(_near_within(left, m1, right, m2, k), pairwise(left, m1, right, m2, k))
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,26 +1,13 @@
-import os, unittest
-from typing import List
-from index.builders import create_all_indexes
+import unittest
+from testcases._corpora import IDX_A, ensure_index_a
 from query_processing.query_process import process_query
 
-IDX = "testcases/tmp_task2_router.pkl"
+IDX = IDX_A
 
 class TestTask2Router(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
-        docs: List[List[str]] = [
-            ["climate","change","effects"],          # 10
-            ["machine","learning","algorithms"],     # 20
-            ["climate","science","research"],        # 30
-            ["renewable","energy","transition"],     # 40
-        ]
-        dids = [10, 20, 30, 40]
-        create_all_indexes(docs, IDX, dids)
-
-    @classmethod
-    def tearDownClass(cls):
-        if os.path.exists(IDX):
-            os.remove(IDX)
+        ensure_index_a()   # CORPUS_A, docs 10/20/30/40 (see _corpora.py)
 
     def test_router_boolean(self):
         self.assertEqual(process_query("climate AND change", IDX), {10})
@@ -1,26 +1,13 @@
-import os, unittest
-from typing import List
-from index.builders import create_all_indexes
+import unittest
+from testcases._corpora import IDX_A, ensure_index_a
 from query_processing.wildcard import process_wildcard_query
 
-IDX = "testcases/tmp_task2_wildcard.pkl"
+IDX = IDX_A
 
 class TestTask2Wildcard(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
-        docs: List[List[str]] = [
-            ["climate","change","effects"],          # 10
-            ["machine","learning","algorithms"],     # 20
-            ["climate","science","research"],        # 30
-            ["renewable","energy","transition"],     # 40
-        ]
-        dids = [10, 20, 30, 40]
-        create_all_indexes(docs, IDX, dids)
-
-    @classmethod
-    def tearDownClass(cls):
-        if os.path.exists(IDX):
-            os.remove(IDX)
+        ensure_index_a()   # CORPUS_A, docs 10/20/30/40 (see _corpora.py)
 
     def test_prefix(self):
         # climat* -> matches 'climate' -> docs 10,30
@@ -34,5 +21,9 @@ class TestTask2Wildcard(unittest.TestCase):
         # learn*ing -> 'learning' -> doc 20
         self.assertEqual(process_wildcard_query("learn*ing", IDX), {20})
 
+    def test_short_segments(self):
+        # cl*te -> 'climate'; no gram may span the '*' (e.g. 'lt')
+        self.assertEqual(process_wildcard_query("cl*te", IDX), {10, 30})
+
 if __name__ == "__main__":
     unittest.main()
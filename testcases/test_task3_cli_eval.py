@@ -1,24 +1,35 @@
-import os, sys, subprocess, unittest
+import gzip, pickle, tempfile, unittest
 from pathlib import Path
 
+from index.access import get_posting_list
+from index.io import is_package
+from ranking.rankers import _ensure_index
+from testcases._cli import run_cli
+
 class TestTask3DevCLI(unittest.TestCase):
     def test_cli_runs_and_prints_table(self):
         repo = Path(__file__).resolve().parents[1]
         script = repo / "ranking" / "rankers.py"
         self.assertTrue(script.exists(), "ranking/rankers.py missing")
 
-        proc = subprocess.run(
-            [sys.executable, "-u", str(script)],
-            cwd=str(repo),
-            capture_output=True,
-            text=True,
-            timeout=180
-        )
+        # the one CLI test that always pays for a real interpreter, as an
+        # end-to-end smoke of the `python ranking/rankers.py` entry point
+        proc = run_cli("ranking/rankers.py", subprocess=True)
         self.assertEqual(proc.returncode, 0, f"CLI failed:\n{proc.stderr}")
         out = proc.stdout
         self.assertIn("Task 3 — Dev Pearson Correlation", out)
         self.assertIn("Method", out)
         self.assertIn("Pearson r", out)
 
+    def test_stale_gzip_dev_cache_is_rebuilt(self):
+        # dev caches written by the old gzip-pickle io must not be reused
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = Path(tmp)
+            with gzip.open(cache_dir / "dev_index_pkg.pkl", "wb") as f:
+                pickle.dump({"unified": {"a": [1]}}, f)
+            path = _ensure_index(cache_dir, cache_dir, corpus=([4, 9], [["a", "b"], ["a"]]))
+            self.assertTrue(is_package(path))
+            self.assertEqual(get_posting_list("a", path), [4, 9])
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,12 +1,14 @@
+import contextlib
 import os
 import unittest
 from typing import List
 from ranking.rankers import rank_documents
 from index.builders import create_all_indexes
 from index.io import load as load_pkg, dump as dump_pkg
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_task3_edge.pkl"
-IDX_MISS_META = "testcases/tmp_task3_edge_missing_meta.pkl"
+IDX = tmp_index_path("task3_edge.pkl")
+IDX_MISS_META = tmp_index_path("task3_edge_missing_meta.pkl")
 
 class TestTask3EdgeCases(unittest.TestCase):
     @classmethod
@@ -33,7 +35,7 @@ class TestTask3EdgeCases(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         for p in (IDX, IDX_MISS_META):
-            if os.path.exists(p):
+            with contextlib.suppress(FileNotFoundError):
                 os.remove(p)
 
     def test_repeated_query_terms(self):
@@ -1,10 +1,12 @@
+import contextlib
 import os
 import unittest
 from typing import List
 from ranking.rankers import rank_documents
 from index.builders import create_all_indexes
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_task3_fallback.pkl"
+IDX = tmp_index_path("task3_fallback.pkl")
 
 class TestTask3MethodsAndFallback(unittest.TestCase):
     @classmethod
@@ -19,7 +21,7 @@ class TestTask3MethodsAndFallback(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(IDX):
+        with contextlib.suppress(FileNotFoundError):
             os.remove(IDX)
 
     def test_unknown_method_falls_back_to_bm25(self):
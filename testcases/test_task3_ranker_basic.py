@@ -1,11 +1,13 @@
+import contextlib
 import os
 import math
 import unittest
 from typing import List
 from ranking.rankers import rank_documents
 from index.builders import create_all_indexes
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_task3_basic.pkl"
+IDX = tmp_index_path("task3_basic.pkl")
 
 class TestTask3BasicRanking(unittest.TestCase):
     @classmethod
@@ -23,7 +25,7 @@ class TestTask3BasicRanking(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(IDX):
+        with contextlib.suppress(FileNotFoundError):
             os.remove(IDX)
 
     def test_bm25_default_full_permutation(self):
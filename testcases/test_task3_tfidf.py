@@ -1,10 +1,12 @@
+import contextlib
 import os
 import unittest
 from typing import List
 from ranking.rankers import rank_documents
 from index.builders import create_all_indexes
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_task3_tfidf.pkl"
+IDX = tmp_index_path("task3_tfidf.pkl")
 
 class TestTask3TFIDF(unittest.TestCase):
     @classmethod
@@ -20,7 +22,7 @@ class TestTask3TFIDF(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(IDX):
+        with contextlib.suppress(FileNotFoundError):
             os.remove(IDX)
 
     def test_tfidf_prefers_higher_tf(self):
@@ -1,10 +1,12 @@
+import contextlib
 import os
 import unittest
 from typing import List
 from ranking.rankers import rank_documents
 from index.builders import create_all_indexes
+from testcases._corpora import tmp_index_path
 
-IDX = "testcases/tmp_task3_ties.pkl"
+IDX = tmp_index_path("task3_ties.pkl")
 
 class TestTask3Ties(unittest.TestCase):
     @classmethod
@@ -19,7 +21,7 @@ class TestTask3Ties(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        if os.path.exists(IDX):
+        with contextlib.suppress(FileNotFoundError):
             os.remove(IDX)
 
     def test_bm25_tie_break_by_docid(self):
@@ -30,5 +32,11 @@ class TestTask3Ties(unittest.TestCase):
         ranked, scores = rank_documents(["x"], self.docs, self.ids, IDX, method="tfidf")
         self.assertEqual(ranked, [10, 20])
 
+    def test_top_k_cut_respects_tie_break(self):
+        # top_k=1 among tied docs keeps the smaller doc_id
+        ranked, scores = rank_documents(["x"], self.docs, self.ids, IDX, method="bm25", top_k=1)
+        self.assertEqual(ranked, [10])
+        self.assertEqual(len(scores), 1)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,7 @@
-import json, os, sys, tempfile, subprocess, pathlib, unittest
+import json, tempfile, subprocess, pathlib, unittest
 from typing import List, Dict
 
-REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
-SYS_PY = sys.executable
+from testcases._cli import run_cli
 
 class TestTask4CLISchema(unittest.TestCase):
     def setUp(self):
@@ -50,9 +49,7 @@ class TestTask4CLISchema(unittest.TestCase):
         self.tmpdir.cleanup()
 
     def _run_cli(self) -> subprocess.CompletedProcess:
-        script = REPO_ROOT / "system" / "search_system.py"
-        cmd = [SYS_PY, "-u", str(script), str(self.queries_path), str(self.docs_path), str(self.run_path)]
-        return subprocess.run(cmd, cwd=str(REPO_ROOT), capture_output=True, text=True, timeout=180)
+        return run_cli("system/search_system.py", self.queries_path, self.docs_path, self.run_path)
 
     def test_cli_runs_and_schema_is_valid(self):
         proc = self._run_cli()
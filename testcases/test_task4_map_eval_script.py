@@ -1,7 +1,8 @@
-import json, os, sys, tempfile, subprocess, pathlib, unittest
+import json, tempfile, pathlib, unittest
+
+from metrics.eval_map import _map_for_run
+from testcases._cli import REPO_ROOT, run_cli
 
-REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
-SYS_PY = sys.executable
 
 class TestTask4MAPEval(unittest.TestCase):
     def setUp(self):
@@ -36,15 +37,12 @@ class TestTask4MAPEval(unittest.TestCase):
 
     def tearDown(self):
         try:
-            if self.run_under_repo.exists():
-                self.run_under_repo.unlink()
+            self.run_under_repo.unlink(missing_ok=True)
         finally:
             self.tmpdir.cleanup()
 
     def _run_cli(self):
-        script = REPO_ROOT / "system" / "search_system.py"
-        cmd = [SYS_PY, "-u", str(script), str(self.queries), str(self.docs), str(self.run_local)]
-        proc = subprocess.run(cmd, cwd=str(REPO_ROOT), capture_output=True, text=True, timeout=180)
+        proc = run_cli("system/search_system.py", self.queries, self.docs, self.run_local)
         self.assertEqual(proc.returncode, 0, f"CLI failed:\nSTDERR:\n{proc.stderr}")
         self.assertTrue(self.run_local.exists(), "CLI did not create a run file")
 
@@ -52,9 +50,7 @@ class TestTask4MAPEval(unittest.TestCase):
         # Move run to ./runs so metrics/eval_map.py will pick it up
         self.run_under_repo.write_text(self.run_local.read_text(encoding="utf-8"), encoding="utf-8")
 
-        script = REPO_ROOT / "metrics" / "eval_map.py"
-        proc = subprocess.run([SYS_PY, "-u", str(script)],
-                              cwd=str(REPO_ROOT), capture_output=True, text=True, timeout=180)
+        proc = run_cli("metrics/eval_map.py")
         self.assertEqual(proc.returncode, 0, f"MAP script failed:\nSTDERR:\n{proc.stderr}")
         return proc.stdout
 
@@ -69,5 +65,12 @@ class TestTask4MAPEval(unittest.TestCase):
         self.assertIn("MAP", out)
         self.assertIn("run_task4_map.json", out)
 
+    def test_mixed_id_types_are_all_converted(self):
+        # ids written as strings anywhere in the list still match int judgments
+        relevant = {"Q1": frozenset({1, 2})}
+        for docs in ([1, 2], ["1", "2"], [1, "2"], ["1", 2]):
+            with self.subTest(docs=docs):
+                self.assertEqual(_map_for_run([{"qid": "Q1", "doc_ids": docs}], relevant), 1.0)
+
 if __name__ == "__main__":
     unittest.main()
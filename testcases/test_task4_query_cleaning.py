@@ -0,0 +1,100 @@
+"""
+Query cleaning and run shaping of the Task 4 batch CLI (system/search_system.py).
+Run with:  python -m unittest testcases/test_task4_query_cleaning.py
+Skipped when the NLTK data (punkt, stopwords, wordnet) is not installed.
+"""
+
+import json, pathlib, sys, tempfile, unittest
+from unittest import mock
+
+from system import search_system
+from testcases._cli import REPO_ROOT, run_cli
+
+class TestTask4QueryCleaning(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            search_system.preprocess("probe")
+        except LookupError as e:
+            raise unittest.SkipTest(f"NLTK data missing: {e}")
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = pathlib.Path(self.tmpdir.name)
+        self.docs_path = self.tmp / "docs.jsonl"
+        self.queries_path = self.tmp / "queries.json"
+        self.run_path = self.tmp / "run.json"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _run(self, docs, queries, *extra):
+        with self.docs_path.open("w", encoding="utf-8") as f:
+            for d in docs:
+                f.write(json.dumps(d) + "\n")
+        self.queries_path.write_text(json.dumps(queries), encoding="utf-8")
+        proc = run_cli("system/search_system.py", self.queries_path, self.docs_path, self.run_path, *extra)
+        self.assertEqual(proc.returncode, 0, f"CLI failed:\nSTDERR:\n{proc.stderr}")
+        return {r["qid"]: r for r in json.loads(self.run_path.read_text(encoding="utf-8"))}
+
+    def test_structured_operands_are_lemmatized(self):
+        docs = [
+            {"id": 1, "text": "Wolves and geese of Canada studies"},
+            {"id": 2, "text": "a study of cats"},
+        ]
+        queries = [
+            {"qid": "inflected", "query": "wolves AND studies"},
+            {"qid": "lemmas", "query": "wolf AND study"},
+            {"qid": "nl", "query": "wolves studies"},
+            {"qid": "phrase", "query": '"Geese of Canada"'},      # stopword dropped, as in the index
+            {"qid": "near", "query": "Wolves NEAR/1 geese"},
+            {"qid": "stop_operand", "query": "the AND cats"},     # "the" is never indexed
+        ]
+        run = self._run(docs, queries)
+        self.assertEqual(set(run["inflected"]["doc_ids"]), {1})
+        self.assertEqual(run["inflected"]["doc_ids"], run["lemmas"]["doc_ids"])
+        self.assertIn(1, run["nl"]["doc_ids"])
+        self.assertEqual(run["phrase"]["doc_ids"], [1])
+        self.assertEqual(run["near"]["doc_ids"], [1])
+        self.assertEqual(run["stop_operand"]["doc_ids"], [])
+
+    def test_clean_query(self):
+        cases = {
+            "Wolves AND NOT studies": ("wolf AND NOT study", ["wolf", "study"]),
+            '"Geese of Canada" NEAR/3 wolves': ('"goose canada" NEAR/3 wolf', ["goose", "canada", "wolf"]),
+            '"the of" OR cats': ('"the of" OR cat', ["cat"]),
+            "Clim*": ("clim*", ["clim"]),                       # patterns are only lowercased
+            "(cats OR dogs) AND 2020": ("(cat OR dog) AND 2020", ["cat", "dog"]),
+        }
+        for query, want in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(search_system._clean_query(query), want)
+        self.assertEqual(search_system._clean_query('"unclosed'), (None, []))
+
+    def test_runs_keep_top_k(self):
+        docs = [{"id": i, "text": "climate " * (i % 5 + 1) + f"filler{i}"} for i in range(1, 16)]
+        run = self._run(docs, [{"qid": "Q", "query": "climate"}])
+        self.assertEqual(search_system.TOP_K, 10)
+        self.assertEqual(len(run["Q"]["doc_ids"]), 10)
+        self.assertEqual(len(run["Q"]["scores"]), 10)
+        self.assertEqual(run["Q"]["scores"], sorted(run["Q"]["scores"], reverse=True))
+
+    def test_method_argument_is_passed_to_ranker(self):
+        docs = [{"id": 1, "text": "climate change"}, {"id": 2, "text": "climate policy"}]
+        with self.docs_path.open("w", encoding="utf-8") as f:
+            for d in docs:
+                f.write(json.dumps(d) + "\n")
+        self.queries_path.write_text(json.dumps([{"qid": "Q", "query": "climate"}]), encoding="utf-8")
+        for extra, want in (([], "default"), (["tfidf"], "tfidf")):
+            with self.subTest(argv=extra):
+                argv = [str(REPO_ROOT / "system/search_system.py"), str(self.queries_path),
+                        str(self.docs_path), str(self.run_path)] + extra
+                with mock.patch.object(sys, "argv", argv), \
+                        mock.patch.object(search_system, "rank_documents",
+                                          wraps=search_system.rank_documents) as ranker, \
+                        mock.patch("builtins.print"):
+                    search_system.main()
+                self.assertEqual({c.kwargs["method"] for c in ranker.call_args_list}, {want})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Optional numba kernels for utils/embeddings.py.
+
+`segment_reduce` is the JIT-compiled kernel when numba is installed and None
+otherwise, in which case semantic_vector keeps its numpy path. Both paths
+accumulate sums in float64 and agree up to rounding order.
+"""
+
+import numpy as np
+
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:  # optional dependency
+    njit = None
+    prange = range
+else:
+    # numba picks TBB first when libtbb is present, and TBB then hangs at
+    # interpreter exit in a process that has forked (the index build and
+    # preprocess_batch use fork pools). OpenMP does not; this only takes effect
+    # before the first parallel kernel runs.
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+
+def _segment_reduce(mat, rows, ends, sum_out, max_out):
+    """
+    For every document d with tokens rows[ends[d-1]:ends[d]] (ends[-1] := 0),
+    write the sum of those rows of `mat` (accumulated in float64) into
+    sum_out[d] and their element-wise max into max_out[d]. Empty documents are
+    left untouched. Pass a (0, dim) array as sum_out or max_out to skip that
+    reduction.
+    """
+    dim = mat.shape[1]
+    want_sum = sum_out.shape[0] > 0
+    want_max = max_out.shape[0] > 0
+    for d in prange(ends.shape[0]):
+        a = ends[d - 1] if d > 0 else 0
+        b = ends[d]
+        if b == a:
+            continue
+        acc = np.zeros(dim)
+        top = mat[rows[a]].copy()
+        for t in range(a, b):
+            row = mat[rows[t]]            # one contiguous row per token
+            for j in range(dim):
+                v = row[j]
+                acc[j] += v
+                if v > top[j]:
+                    top[j] = v
+        if want_sum:
+            sum_out[d] = acc
+        if want_max:
+            max_out[d] = top
+
+
+segment_reduce = (
+    njit(parallel=True, cache=True, nogil=True)(_segment_reduce) if njit is not None else None
+)
@@ -0,0 +1,85 @@
+"""
+Optional numba kernels for utils/tfidf.py.
+
+`row_counts` and `bm25_weights` are JIT-compiled kernels when numba is
+installed and None otherwise, in which case tfidf_variants keeps its numpy
+path. Both paths produce the same CSR entries in the same (row, then column)
+order, and the same weights (fastmath is off, operations run in numpy's order).
+"""
+
+import numpy as np
+
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:  # optional dependency
+    njit = None
+    prange = range
+else:
+    # OpenMP before TBB, which hangs at exit after a fork (see _embed_kernels)
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+
+def _row_counts(ids, ends):
+    """
+    For every row i with column ids ids[ends[i-1]:ends[i]] (ends[-1] := 0),
+    emit one (column, count) entry per distinct column, columns ascending.
+    Returns (indptr, cols, counts) in CSR layout: row i owns entries
+    indptr[i]:indptr[i+1].
+
+    Rows run in parallel in two passes. The first sorts each row's segment
+    into its own slice of a scratch copy and counts its distinct columns. The
+    prefix sum of those counts gives every row its own output slice, which the
+    second pass fills, so no two threads ever write the same location.
+    """
+    n_rows = ends.shape[0]
+    srt = np.empty_like(ids)
+    row_nnz = np.zeros(n_rows, dtype=np.int64)
+    for i in prange(n_rows):
+        a = ends[i - 1] if i > 0 else 0
+        b = ends[i]
+        if b > a:
+            srt[a:b] = np.sort(ids[a:b])
+            n = 1
+            for t in range(a + 1, b):
+                if srt[t] != srt[t - 1]:
+                    n += 1
+            row_nnz[i] = n
+
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(row_nnz)
+    cols = np.empty(indptr[n_rows], dtype=np.int32)
+    counts = np.empty(indptr[n_rows], dtype=np.int64)
+    for i in prange(n_rows):
+        a = ends[i - 1] if i > 0 else 0
+        b = ends[i]
+        if b == a:
+            continue
+        p = indptr[i]
+        cols[p] = srt[a]
+        counts[p] = 1
+        for t in range(a + 1, b):
+            if srt[t] == srt[t - 1]:
+                counts[p] += 1
+            else:
+                p += 1
+                cols[p] = srt[t]
+                counts[p] = 1
+    return indptr, cols, counts
+
+
+row_counts = (
+    njit(parallel=True, cache=True, nogil=True)(_row_counts) if njit is not None else None
+)
+
+
+def _bm25_weights(tf, idf, k, out):
+    """out[e] = ((k + 1) * tf[e]) / (k + tf[e]) * idf[e] for every entry e, in one pass."""
+    k1 = k + 1.0
+    for e in prange(tf.shape[0]):
+        out[e] = (k1 * tf[e]) / (k + tf[e]) * idf[e]
+
+
+bm25_weights = (
+    njit(parallel=True, cache=True, nogil=True)(_bm25_weights) if njit is not None else None
+)
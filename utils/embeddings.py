@@ -1,54 +1,163 @@
 """Light-weight GloVe loader & semantic aggregation (Task A-4)."""
-import io, zipfile, urllib.request, pathlib
-from typing import Dict, List
+import io, itertools, os, shutil, tempfile, zipfile, urllib.request, pathlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
 
 import numpy as np
 
+from ._embed_kernels import segment_reduce
+
 # ----------------------------------------------------------------------
 # 1.  Load a 200-d slice of GloVe (or from cache) and add a random <unk>
 # ----------------------------------------------------------------------
 _GLOVE_URL  = ("http://nlp.stanford.edu/data/glove.6B.zip", "glove.6B.200d.txt")
-_CACHE      = pathlib.Path.home() / ".cache" / "ir_glove_200.txt"
+_CACHE_DIR  = pathlib.Path.home() / ".cache"
+_CACHE      = _CACHE_DIR / "ir_glove_200.txt"          # legacy text cache, still read if present
+_CACHE_WORDS = _CACHE_DIR / "ir_glove_200.words.txt"   # one word per line, row order of the matrix
+_CACHE_MAT  = _CACHE_DIR / "ir_glove_200.npy"          # float32 (V, dim), memory-mapped on load
+_PARSE_LINES = 50_000                                  # text lines parsed per numpy call
+_GATHER_TOKENS = 1 << 16                               # token rows gathered per aggregation block
+_SMALL_N = 4                                           # batches up to this size skip the block machinery
+
+
+def _parse_glove(lines: Iterable[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Parse GloVe text ("word v_1 ... v_dim" per line) into (words, float32 matrix).
+    Each batch of lines is handed to numpy's C reader (np.loadtxt) in one call
+    instead of building a small array per line.
+    """
+    words: List[str] = []
+    blocks: List[np.ndarray] = []
+    lines = iter(lines)
+    while True:
+        batch = list(itertools.islice(lines, _PARSE_LINES))
+        if not batch:
+            break
+        rests = []
+        for line in batch:
+            word, _, rest = line.strip().partition(" ")
+            words.append(word)
+            rests.append(rest)
+        blocks.append(np.loadtxt(rests, dtype=np.float32, ndmin=2))
+    return words, np.concatenate(blocks, axis=0)
 
 
-def _ensure_glove() -> Dict[str, np.ndarray]:
-    if not _CACHE.exists():
-        url, fname = _GLOVE_URL
+def _download_glove() -> Tuple[List[str], np.ndarray]:
+    """Stream the GloVe zip to a temporary file and parse the 200-d member from it."""
+    url, fname = _GLOVE_URL
+    with tempfile.TemporaryFile() as tmp:
         with urllib.request.urlopen(url) as resp:
-            with zipfile.ZipFile(io.BytesIO(resp.read())) as zf:
-                _CACHE.write_text(zf.read(fname).decode("utf-8"), encoding="utf-8", newline="\n")
+            shutil.copyfileobj(resp, tmp)
+        tmp.seek(0)
+        with zipfile.ZipFile(tmp) as zf, zf.open(fname) as member:
+            return _parse_glove(io.TextIOWrapper(member, encoding="utf-8", newline="\n"))
+
+
+def _ensure_glove() -> Tuple[List[str], np.ndarray]:
+    """
+    Return (words, matrix): row i of the float32 matrix is the vector of words[i],
+    with a deterministic random <unk> row. The parsed table is cached as a word
+    list plus an .npy matrix, so later loads only memory-map the matrix.
+    """
+    if _CACHE_WORDS.exists() and _CACHE_MAT.exists():
+        words = _CACHE_WORDS.read_text(encoding="utf-8").split("\n")
+        return words, np.load(_CACHE_MAT, mmap_mode="r")
 
-    vocab = {}
-    with _CACHE.open("r", encoding="utf-8", newline="\n") as f:
-        for line in f:
-            word, *vec = line.strip().split()
-            vocab[word] = np.asarray(vec, dtype=float)
+    if _CACHE.exists():
+        with _CACHE.open("r", encoding="utf-8", newline="\n") as f:
+            words, mat = _parse_glove(f)
+    else:
+        words, mat = _download_glove()
 
     # deterministic random <unk> – keeps load fast
-    if "<unk>" not in vocab:
+    if "<unk>" not in words:
         rng = np.random.default_rng(seed=42)
-        dim = len(next(iter(vocab.values())))
-        vocab["<unk>"] = rng.normal(0.0, 0.05, size=dim)
+        unk = rng.normal(0.0, 0.05, size=mat.shape[1]).astype(np.float32)
+        words.append("<unk>")
+        mat = np.vstack([mat, unk])
 
-    return vocab
+    _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_mat = _CACHE_MAT.with_name(_CACHE_MAT.name + ".tmp.npy")
+    np.save(tmp_mat, mat)
+    tmp_words = _CACHE_WORDS.with_name(_CACHE_WORDS.name + ".tmp")
+    tmp_words.write_text("\n".join(words), encoding="utf-8", newline="\n")
+    os.replace(tmp_mat, _CACHE_MAT)
+    os.replace(tmp_words, _CACHE_WORDS)
+    return words, mat
 
 
-_WORD_VEC: Dict[str, np.ndarray] = _ensure_glove()
-_DIM: int = next(iter(_WORD_VEC.values())).shape[0]
+@lru_cache(maxsize=1)
+def _glove() -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Return (word -> row, matrix), loaded on first use: importing this module
+    costs nothing, and the memory-mapped matrix is shared through the page
+    cache by every process that uses it.
+    """
+    words, mat = _ensure_glove()
+    return {w: i for i, w in enumerate(words)}, mat
 
 
 # ----------------------------------------------------------------------
 # 2.  Public helper
 # ----------------------------------------------------------------------
-def _key(tok: str) -> str:
-    """Return token itself if in vocab, else '<unk>'."""
-    return tok if tok in _WORD_VEC else "<unk>"
+def _token_rows(docs: Sequence[Sequence[str]], vocab: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (rows, lengths): the matrix row of every token of every doc (OOV -> <unk>), flattened, and per-doc lengths."""
+    get = vocab.get
+    unk = vocab["<unk>"]
+    lengths = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+    rows = np.fromiter(
+        (get(t, unk) for d in docs for t in d), dtype=np.int64, count=int(lengths.sum())
+    )
+    return rows, lengths
+
+
+def _doc_blocks(lengths: np.ndarray):
+    """Yield (lo, hi) doc ranges of about _GATHER_TOKENS tokens, bounding the gathered matrix."""
+    ends = np.cumsum(lengths)
+    lo = 0
+    while lo < lengths.size:
+        base = int(ends[lo - 1]) if lo else 0
+        hi = max(int(np.searchsorted(ends, base + _GATHER_TOKENS, side="right")), lo + 1)
+        yield lo, hi
+        lo = hi
+
+
+@lru_cache(maxsize=8)
+def _tfidf_weights(docs: Tuple[Tuple[str, ...], ...]):
+    """
+    Return (pair_row, w, ends, den) for the tfidf_weighted aggregation of `docs`:
+    the matrix row and tf-idf weight of every distinct (doc, token) pair with a
+    positive weight, grouped by doc (doc i owns pairs ends[i-1]:ends[i]), and
+    each doc's weight total. Cached per corpus; the arrays are read-only.
+    OOV tokens share the <unk> row, so they also share one df / weight.
+    """
+    vocab, mat = _glove()
+    N, V = len(docs), mat.shape[0]
+    flat, lengths = _token_rows(docs, vocab)
+    pair, tf = np.unique(np.repeat(np.arange(N, dtype=np.int64), lengths) * V + flat, return_counts=True)
+    pair_doc, pair_row = np.divmod(pair, V)               # sorted by doc, then row
+
+    # IDF = ln(N / df), df = number of docs containing the row
+    df = np.bincount(pair_row, minlength=V)
+    w = tf * np.log(N / df[pair_row])                     # tf-idf weight per pair
+    keep = w > 0.0
+    pair_doc, pair_row, w = pair_doc[keep], pair_row[keep], w[keep]
+    den = np.bincount(pair_doc, weights=w, minlength=N)
+    ends = tuple(np.searchsorted(pair_doc, np.arange(1, N + 1)).tolist())
+    for arr in (pair_row, w, den):
+        arr.flags.writeable = False
+    return pair_row, w, ends, den
 
 
 # ----------------------------------------------------------------------
 # 3.  Main entry
 # ----------------------------------------------------------------------
 def semantic_vector(docs: List[List[str]], method: str = "mean") -> np.ndarray:
+    """
+    Embed each document as an (N, dim) float32 array ((N, 2*dim) for meanmax).
+    Sums and tf-idf weights accumulate in float64 before the float32 store;
+    GloVe itself carries about 6 significant digits, so float32 loses nothing.
+    """
 
     # Input validation
     if not isinstance(docs, list):
@@ -63,77 +172,88 @@ def semantic_vector(docs: List[List[str]], method: str = "mean") -> np.ndarray:
     if method not in {"mean", "max", "sum", "tfidf_weighted", "meanmax"}:
         raise ValueError("method must be one of: mean, max, sum, tfidf_weighted, meanmax")
 
+    vocab, mat = _glove()
+    dim = mat.shape[1]
+
     N = len(docs)
     if N == 0:
-        # For meanmax, width is 2*_DIM; for others, _DIM.
-        width = (2 * _DIM) if method == "meanmax" else _DIM
-        return np.zeros((0, width), dtype=float)
+        # For meanmax, width is 2*dim; for others, dim.
+        width = (2 * dim) if method == "meanmax" else dim
+        return np.zeros((0, width), dtype=np.float32)
 
-    # Baseline aggregations
-    if method in {"mean", "max", "sum", "meanmax"}:
-        rows = []
-        for doc in docs:
-            if not doc:
-                mean_vec = np.zeros(_DIM, dtype=float)
-                max_vec  = np.zeros(_DIM, dtype=float)
-                sum_vec  = np.zeros(_DIM, dtype=float)
-            else:
-                # Map tokens to known keys (OOV -> '<unk>') and stack vectors
-                vecs = [_WORD_VEC[_key(t)] for t in doc]
-                M = np.vstack(vecs).astype(float)     # (len(doc), _DIM)
-                sum_vec  = M.sum(axis=0)
-                mean_vec = sum_vec / M.shape[0]
-                max_vec  = M.max(axis=0)
-
-            if method == "mean":
-                rows.append(mean_vec)
-            elif method == "max":
-                rows.append(max_vec)
-            elif method == "sum":
-                rows.append(sum_vec)
-            else:  # "meanmax"
-                rows.append(np.concatenate([mean_vec, max_vec], axis=0))
-
-        return np.vstack(rows)
-
-    # TF-IDF weighted average
-    # Replace OOV tokens with <unk> when computing TF-IDF.
-    try:
-        
-        mapped_docs: List[List[str]] = [[_key(t) for t in doc] for doc in docs]
-
-        df: Dict[str, int] = {}
-        for doc in mapped_docs:
-            for tok in set(doc):
-                df[tok] = df.get(tok, 0) + 1
-
-        # IDF = ln(N / df)
-        idf: Dict[str, float] = {tok: float(np.log(N / df_val)) for tok, df_val in df.items()}
-
-        # Build weighted vectors per doc
-        out = np.zeros((N, _DIM), dtype=float)
-
-        for i, doc in enumerate(mapped_docs):
-            if not doc:
+    # A handful of docs (single queries, unit tests): a plain per-doc gather and
+    # reduce, without the flat index arrays or block bookkeeping
+    if N <= _SMALL_N and method != "tfidf_weighted":
+        get, unk = vocab.get, vocab["<unk>"]
+        out = np.zeros((N, 2 * dim if method == "meanmax" else dim), dtype=np.float32)
+        for i, d in enumerate(docs):
+            if not d:
                 continue
+            M = mat[[get(t, unk) for t in d]]
+            if method == "max":
+                out[i] = M.max(axis=0)
+                continue
+            total = M.sum(axis=0, dtype=np.float64)
+            if method == "sum":
+                out[i] = total
+                continue
+            out[i, :dim] = total.astype(np.float32) / np.float32(len(d))
+            if method == "meanmax":
+                out[i, dim:] = M.max(axis=0)
+        return out
 
-            # raw term counts
-            counts: Dict[str, int] = {}
-            for tok in doc:
-                counts[tok] = counts.get(tok, 0) + 1
-
-            num = np.zeros(_DIM, dtype=float)
-            den = 0.0
-            for tok, tf in counts.items():
-                w = tf * idf.get(tok, 0.0)  # tf-idf weight
-                if w <= 0.0:
-                    continue
-                num += w * _WORD_VEC[tok]   # tok guaranteed via _key()
-                den += w
+    # Baseline aggregations: one row gather per block of docs, then each doc
+    # reduces a contiguous slice of it in place (empty docs stay all-zero);
+    # with numba installed a compiled kernel does the same without the gather
+    if method in {"mean", "max", "sum", "meanmax"}:
+        flat, lengths = _token_rows(docs, vocab)
+        sum_vecs = np.zeros((N, dim), dtype=np.float32)
+        max_vecs = np.zeros((N, dim), dtype=np.float32)
+        want_sum = method != "max"
+        want_max = method in {"max", "meanmax"}
+        if segment_reduce is not None:
+            # numba kernel: one fused sum/max pass over each doc's rows, no gather
+            skip = np.zeros((0, dim), dtype=np.float32)
+            segment_reduce(
+                np.asarray(mat), flat, np.cumsum(lengths),
+                sum_vecs if want_sum else skip, max_vecs if want_max else skip,
+            )
+        else:
+            ends = np.cumsum(lengths).tolist()
+            for lo, hi in _doc_blocks(lengths):
+                t0 = ends[lo - 1] if lo else 0
+                M = mat[flat[t0 : ends[hi - 1]]]               # (tokens in block, dim) float32
+                a = 0
+                for i in range(lo, hi):
+                    b = ends[i] - t0
+                    if b > a:
+                        if want_sum:
+                            M[a:b].sum(axis=0, dtype=np.float64, out=sum_vecs[i])
+                        if want_max:
+                            max_vecs[i] = M[a:b].max(axis=0)
+                    a = b
 
-            out[i] = (num / den) if den > 0.0 else np.zeros(_DIM, dtype=float)
+        if method == "sum":
+            return sum_vecs
+        if method == "max":
+            return max_vecs
+        mean_vecs = sum_vecs / np.maximum(lengths, 1).astype(np.float32)[:, None]
+        if method == "mean":
+            return mean_vecs
+        return np.concatenate([mean_vecs, max_vecs], axis=1)   # "meanmax"
 
-        return out
+    # TF-IDF weighted average; the per-pair weights depend only on the batch,
+    # so repeated calls on the same corpus reuse them
+    pair_row, w, ends, den = _tfidf_weights(tuple(map(tuple, docs)))
 
-    except Exception as e:
-        raise RuntimeError(f"semantic_vector(tfidf_weighted) failed: {e}") from e
\ No newline at end of file
+    out = np.zeros((N, dim), dtype=np.float32)
+    for lo, hi in _doc_blocks(np.diff(ends, prepend=0)):
+        p0 = ends[lo - 1] if lo else 0
+        M = mat[pair_row[p0 : ends[hi - 1]]]              # (pairs in block, dim) float32
+        a = 0
+        for i in range(lo, hi):
+            b = ends[i] - p0
+            if b > a:
+                out[i] = (w[p0 + a : p0 + b] @ M[a:b]) / den[i]
+            a = b
+    return out
@@ -22,17 +22,11 @@ def make_ngrams_tokens(tokens: List[str], n: int) -> List[Tuple[str, ...]]:
     # Pad start and end
     pad = ["<s>"] * (n - 1)
     end = ["</s>"] * (n - 1)
-    seq = pad + list(tokens) + end
-    L = len(seq)
+    seq = pad + tokens + end
 
-    ngrams = []
-
-    for i in range(0, L - n + 1):
-        window = seq[i : i + n]     # take slice of length n
-        ngram = tuple(window)       # convert to tuple
-        ngrams.append(ngram)
-
-    return ngrams
+    # Sliding window in C: zip the n shifted views of seq; zip stops at the
+    # shortest one, giving exactly len(seq) - n + 1 tuples
+    return list(zip(*(seq[i:] for i in range(n))))
 
 def make_ngrams_chars(text: str, n: int) -> List[str]:
 
@@ -44,19 +38,13 @@ def make_ngrams_chars(text: str, n: int) -> List[str]:
     if n <= 0:
         raise ValueError("n must be >= 1")
 
-    if not text.strip():
-        return []
-
+    # Each word is padded as $word$; words too short for this n-gram size yield nothing
     grams: List[str] = []
+    extend = grams.extend
     for w in text.split():
-        if not w.strip():
+        L = len(w) + 2
+        if L < n:
             continue
         padded = f"${w}$"
-
-        # Skip words too short for this n-gram size
-        if len(padded) < n:
-            continue
-
-        if len(padded) >= n:
-            grams.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
-    return grams
\ No newline at end of file
+        extend([padded[i : i + n] for i in range(L - n + 1)])
+    return grams
@@ -1,5 +1,4 @@
 """Token-position mapping (Task A-2)."""
-from collections import defaultdict
 from typing import Dict, List, Union, Tuple
 
 def make_positions(tokens: List[str], n: int = 1) -> Dict[Union[str, Tuple[str, ...]], List[int]]:
@@ -18,14 +17,16 @@ def make_positions(tokens: List[str], n: int = 1) -> Dict[Union[str, Tuple[str,
     if L == 0 or L < n:
         return {}
 
-    positions: Dict[Union[str, Tuple[str, ...]], List[int]] = defaultdict(list)
+    # n-grams come from a C-level zip over n shifted views (n == 1 is the tokens
+    # themselves); first occurrences create their list, later ones append
+    grams = tokens if n == 1 else zip(*(tokens[i:] for i in range(n)))
+    positions: Dict[Union[str, Tuple[str, ...]], List[int]] = {}
+    get = positions.get
+    for i, gram in enumerate(grams):
+        lst = get(gram)
+        if lst is None:
+            positions[gram] = [i]
+        else:
+            lst.append(i)
 
-    if n == 1:
-        for i, tok in enumerate(tokens):
-            positions[tok].append(i)
-    else:
-        for i in range(L - n + 1):
-            gram = tuple(tokens[i : i + n])
-            positions[gram].append(i)
-
-    return dict(positions)
\ No newline at end of file
+    return positions
@@ -1,36 +1,123 @@
 """Robust HTML→tokens cleaning pipeline (Task A-1)."""
-import re, html, unicodedata
-from typing import List
-from bs4 import BeautifulSoup
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import os, re, html, unicodedata
+from html.entities import html5
+from functools import lru_cache
+from typing import Callable, FrozenSet, List, Optional, Sequence, Tuple
 
+_WS_RE = re.compile(r"\s+")
+_MARKUP_CHARS = "<&"        # without these, bs4 would hand the text back unchanged
+# Plain start/end tags with unquoted attributes, and anything html.parser does not
+# treat as ordinary tag + text (comments, doctypes, PIs, raw-text elements).
+_SIMPLE_TAG_RE = re.compile(r"</?[a-zA-Z][^<>\"']*>")
+_COMPLEX_MARKUP_RE = re.compile(
+    r"<(?:[!?]|/?(?:script|style|textarea|title|xmp|iframe|noembed|noframes|noscript|plaintext)\b)",
+    re.IGNORECASE,
+)
+# A '&' html.parser may read as a character reference, and the well-formed ones
+_AMP_REF_RE = re.compile(r"&(?=[#\w])")
+_CHAR_REF_RE = re.compile(r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);")
 
-def make_positions(tokens: List[str], n: int = 1) -> Dict[Union[str, Tuple[str, ...]], List[int]]:
+# Below this many texts preprocess_batch runs in-process; starting workers
+# (and, under spawn, re-importing NLTK in each) costs more than it saves.
+_PARALLEL_MIN_DOCS = 2048
+
+
+@lru_cache(maxsize=1)
+def _nlp() -> Tuple[Callable, Callable[[str], List[str]], FrozenSet[str], Callable[[str], str]]:
+    """
+    (BeautifulSoup, word_tokenize, stopword set, memoized lemmatize), built on
+    first use: bs4/nltk are imported only by callers of preprocess(), and the
+    stopword set and lemmatizer are created once per process, not per call.
+    """
+    from bs4 import BeautifulSoup
+    from nltk.tokenize import word_tokenize
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+
+    stop = frozenset(stopwords.words("english"))
+    lemmatize = lru_cache(maxsize=1 << 16)(WordNetLemmatizer().lemmatize)
+    return BeautifulSoup, word_tokenize, stop, lemmatize
+
+
+def _plain_refs(text: str) -> bool:
+    """
+    True if html.unescape decodes every character reference in `text` the way
+    html.parser does: each is a known named entity or a numeric reference to a
+    valid code point, terminated by ';'. html.parser drops the '&' of a bare
+    trailing "&name" ("R&D" -> "RD") and the ';' of an unknown "&name;", and
+    keeps control characters that html.unescape removes.
+    """
+    for amp in _AMP_REF_RE.finditer(text):
+        ref = _CHAR_REF_RE.match(text, amp.start())
+        if ref is None:
+            return False
+        ref = ref.group()
+        if ref[1] == "#" and not html.unescape(ref):
+            return False
+        if ref[1] != "#" and ref[1:] not in html5:
+            return False
+    return True
+
+
+def _strip_markup(text: str, BeautifulSoup: Callable) -> str:
+    """
+    bs4 get_text(" ") followed by html.unescape, as preprocess has always done.
+    Simple markup (plain tags, no comments/scripts/quoted attributes) is stripped
+    with a regex and its entities decoded directly, which is what html.parser
+    would do; when a '<' would survive that, or a reference is one html.unescape
+    reads differently (see _plain_refs), the text goes through bs4.
+    """
+    if "&" not in text or _plain_refs(text):
+        if "<" in text and not _COMPLEX_MARKUP_RE.search(text):
+            stripped = _SIMPLE_TAG_RE.sub(" ", text)
+            if "<" not in stripped:
+                text = stripped
+        if "<" not in text:
+            return html.unescape(html.unescape(text))   # html.parser's own entity decoding
+    return html.unescape(BeautifulSoup(text, "html.parser").get_text(" "))
+
+
+def preprocess(text: str) -> List[str]:
 
     # Validate arguments
-    if not isinstance(tokens, list):
-        raise TypeError(f"tokens must be a list, got {type(tokens).__name__}")
-    if not all(isinstance(t, str) for t in tokens):
-        raise ValueError("all items in tokens must be strings")
-    if not isinstance(n, int):
-        raise TypeError(f"n must be int, got {type(n).__name__}")
-    if n <= 0:
-        raise ValueError("n must be >= 1")
-    
-    L = len(tokens)
-    if L == 0 or L < n:
-        return {}
-
-    positions: Dict[Union[str, Tuple[str, ...]], List[int]] = defaultdict(list)
-
-    if n == 1:
-        for i, tok in enumerate(tokens):
-            positions[tok].append(i)
-    else:
-        for i in range(L - n + 1):
-            gram = tuple(tokens[i : i + n])
-            positions[gram].append(i)
-
-    return dict(positions)
\ No newline at end of file
+    if not isinstance(text, str):
+        raise TypeError(f"text must be a string, got {type(text).__name__}")
+
+    BeautifulSoup, word_tokenize, stop, lemmatize = _nlp()
+
+    # Strip markup, decode entities, normalise unicode and case
+    if any(c in text for c in _MARKUP_CHARS):
+        text = _strip_markup(text, BeautifulSoup)
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _WS_RE.sub(" ", text).strip()
+    if not text:
+        return []
+
+    # Tokenize, keep alphanumeric non-stopword tokens, lemmatize
+    return [lemmatize(t) for t in word_tokenize(text) if t.isalnum() and t not in stop]
+
+
+def _preprocess_chunk(texts: Sequence[str]) -> List[List[str]]:
+    return [preprocess(t) for t in texts]
+
+
+def preprocess_batch(texts: Sequence[str], workers: Optional[int] = None) -> List[List[str]]:
+    """
+    `preprocess` every text, in order. Batches of at least _PARALLEL_MIN_DOCS
+    texts are split into contiguous chunks across worker processes (defaults
+    to os.cpu_count(), at most one per 1024 texts).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, max(1, len(texts) // 1024))
+    if workers <= 1 or len(texts) < _PARALLEL_MIN_DOCS:
+        return _preprocess_chunk(texts)
+
+    import multiprocessing
+
+    _nlp()   # load NLTK before forking, so fork-started workers inherit it
+    step = -(-len(texts) // workers)
+    chunks = [texts[i : i + step] for i in range(0, len(texts), step)]
+    with multiprocessing.Pool(len(chunks)) as pool:
+        parts = pool.map(_preprocess_chunk, chunks)
+    return [toks for part in parts for toks in part]
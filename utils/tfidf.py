@@ -1,12 +1,86 @@
 """TF-IDF variants (Task A-3)."""
-import math, numpy as np
-from typing import List, Dict, Tuple
+import numpy as np
+from functools import lru_cache
+from typing import Any, List, Dict, Tuple, Union
+
+from ._tfidf_kernels import bm25_weights, row_counts
+
+
+def _matrix(data: np.ndarray, pair_row: np.ndarray, cols: np.ndarray, indptr: np.ndarray,
+            shape: Tuple[int, int], sparse: Any):
+    """
+    Assemble X from its entries (sorted by row, then column) in the requested
+    layout. Index arrays are copied into sparse results, since they may be the
+    read-only arrays cached by _corpus_entries.
+    """
+    if sparse == "coo":
+        from scipy.sparse import coo_matrix
+        return coo_matrix((data, (pair_row.copy(), cols.copy())), shape=shape)
+    if sparse:
+        from scipy.sparse import csr_matrix
+        return csr_matrix((data, cols.copy(), indptr.copy()), shape=shape)
+    X = np.zeros(shape, dtype=data.dtype)
+    X[pair_row, cols] = data
+    return X
+
+
+@lru_cache(maxsize=8)
+def _corpus_entries(docs: Tuple[Tuple[str, ...], ...]):
+    """
+    Mode-independent part of tfidf_variants for one corpus, cached so that
+    comparing tf variants (or k values) on the same docs counts them once.
+    Returns (vocab, pair_row, cols, indptr, tf, doc_len, idf): the vocabulary and,
+    per distinct (doc, term) entry sorted by row then column, its row, column,
+    count, doc length and term idf; row i owns entries indptr[i]:indptr[i+1].
+    Arrays are read-only; callers copy the vocab before handing it out.
+    """
+    N = len(docs)
+
+    # Vocabulary and token ids in one pass over the corpus: setdefault hands out
+    # the next column on a term's first occurrence and its column afterwards
+    vocab: Dict[str, int] = {}
+    assign = vocab.setdefault
+    lengths = np.fromiter((len(doc) for doc in docs), dtype=np.int64, count=N)
+    ids = np.fromiter(
+        (assign(tok, len(vocab)) for doc in docs for tok in doc),
+        dtype=np.int64,
+        count=int(lengths.sum()),
+    )
+    V = len(vocab)
+
+    # Term counts in CSR layout. Without numba, one unique over row * V + column
+    # keys yields the same entries.
+    if row_counts is not None:
+        indptr, cols, counts = row_counts(ids, np.cumsum(lengths))
+        pair_row = np.repeat(np.arange(N, dtype=np.int64), np.diff(indptr))
+    elif V == 0:  # no docs, or only empty ones
+        pair_row = counts = np.empty(0, dtype=np.int64)
+        cols = np.empty(0, dtype=np.int32)
+        indptr = np.zeros(N + 1, dtype=np.int64)
+    else:
+        rows = np.repeat(np.arange(N, dtype=np.int64), lengths)
+        pair, counts = np.unique(rows * V + ids, return_counts=True)
+        pair_row, cols = np.divmod(pair, V)
+        cols = cols.astype(np.int32)
+        indptr = np.searchsorted(pair_row, np.arange(N + 1))
+
+    # Document frequency: each (row, column) entry is one doc containing the term
+    df = np.bincount(cols, minlength=V)
+    idf = np.log(N / df.astype(float))
+
+    entries = (pair_row, cols, indptr, counts.astype(float), lengths[pair_row].astype(float), idf[cols])
+    for arr in entries:
+        arr.flags.writeable = False
+    return (vocab,) + entries
+
 
 def tfidf_variants(
         docs: List[List[str]],
         tf_mode: str = "raw",
-        k: float = 1.2
-) -> Tuple[np.ndarray, Dict[str, int]]:
+        k: float = 1.2,
+        sparse: Union[bool, str] = False,
+        dtype: Any = np.float32,
+) -> Tuple[Any, Dict[str, int]]:
     """
     Build a TF-IDF matrix with selectable TF variants.
 
@@ -17,10 +91,16 @@ def tfidf_variants(
             - log  : 1 + ln(tf) if tf>0 else 0
             - bm25 : ((k+1)*tf)/(k+tf)
         k: BM25 saturation parameter (only used when tf_mode='bm25').
+        sparse: return X as a scipy.sparse.csr_matrix (True or 'csr') or coo_matrix
+            ('coo') instead of a dense array (requires scipy); memory is O(nnz)
+            rather than O(num_docs * num_terms). COO drops the row-pointer array,
+            which dominates for many tiny docs (queries) over a large vocabulary.
+        dtype: floating-point dtype of X. Weights are computed in float64 and
+            rounded once on store.
 
     Returns:
         (X, vocab):
-          - X: np.ndarray of shape [num_docs, num_terms]
+          - X: np.ndarray of shape [num_docs, num_terms] (scipy sparse if `sparse`)
           - vocab: Dict[str, int] term -> column index (first occurrence order)
     """
     # Input validation
@@ -39,64 +119,30 @@ def tfidf_variants(
         raise TypeError(f"'k' must be a number, got {type(k).__name__}")
     if tf_mode == "bm25" and k <= 0:
         raise ValueError("For bm25, 'k' must be > 0")
-
-    try:
-        N = len(docs)
-        if N == 0:
-            return np.zeros((0, 0), dtype=float), {}
-
-        # Build vocabulary
-        vocab: Dict[str, int] = {}
-        for doc in docs:
-            for tok in doc:
-                if tok not in vocab:
-                    vocab[tok] = len(vocab)
-
-        V = len(vocab)
-        if V == 0:
-            return np.zeros((N, 0), dtype=float), vocab
-
-        # Document frequency
-        df = np.zeros(V, dtype=int)
-        for doc in docs:
-            seen = set()
-            for tok in doc:
-                j = vocab[tok]
-                if j not in seen:
-                    df[j] += 1
-                    seen.add(j)
-
-        idf = np.log(N / df.astype(float))
-
-        # Allocate matrix
-        X = np.zeros((N, V), dtype=float)
-
-        # Fill TF-IDF rows
-        for i, doc in enumerate(docs):
-            if not doc:
-                continue
-
-            # term counts
-            counts: Dict[str, int] = {}
-            for tok in doc:
-                counts[tok] = counts.get(tok, 0) + 1
-
-            L = float(len(doc))  # for raw tf
-
-            for tok, tf in counts.items():
-                j = vocab[tok]
-
-                if tf_mode == "raw":
-                    tf_w = tf / L
-                elif tf_mode == "log":
-                    tf_w = 1.0 + math.log(tf) if tf > 0 else 0.0
-                else:  # 'bm25'
-                    tf_w = ((k + 1.0) * tf) / (k + tf)
-
-                X[i, j] = tf_w * idf[j]
-
-        return X, vocab
-
-    except Exception as e:
-        # Prevent crashes with a clear error context
-        raise RuntimeError(f"tfidf_variants failed: {e}") from e
\ No newline at end of file
+    dtype = np.dtype(dtype)
+    if dtype.kind != "f":
+        raise ValueError(f"'dtype' must be a floating-point dtype, got {dtype}")
+    if sparse not in (False, True, "csr", "coo"):
+        raise ValueError("sparse must be False, True / 'csr', or 'coo'")
+    if sparse:
+        import scipy.sparse  # optional dependency: fail before doing any work
+
+    vocab, pair_row, cols, indptr, tf, doc_len, idf = _corpus_entries(tuple(map(tuple, docs)))
+
+    # TF variant, chosen once and applied to every stored count (all >= 1)
+    if tf_mode == "bm25" and bm25_weights is not None:
+        # numba: saturation and idf multiply fused, no full-size temporaries
+        data = np.empty_like(tf)
+        bm25_weights(tf, idf, float(k), data)
+    else:
+        if tf_mode == "raw":
+            data = tf / doc_len
+        elif tf_mode == "log":
+            data = 1.0 + np.log(tf)
+        else:  # 'bm25'
+            data = ((k + 1.0) * tf) / (k + tf)
+        np.multiply(data, idf, out=data)
+    data = data.astype(dtype, copy=False)
+
+    X = _matrix(data, pair_row, cols, indptr, (len(docs), len(vocab)), sparse)
+    return X, dict(vocab)